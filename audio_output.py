@@ -0,0 +1,129 @@
+import sys
+import time
+from array import array
+
+from PyQt6.QtCore import QIODevice, QObject, QThread, QMetaObject, Qt, pyqtSlot
+from PyQt6.QtMultimedia import QAudioFormat, QAudioSink, QAudioSource, QMediaDevices
+
+from cue_audio import SAMPLE_WIDTH, BUFFER_MS
+
+
+class MixerDevice(QIODevice):
+    # Endless read-only stream; the sink pulls mixed cue audio (or silence) from it
+
+    def __init__(self, mixer):
+        super().__init__()
+        self.mixer = mixer
+        self.open(QIODevice.OpenModeFlag.ReadOnly)
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return self.mixer.rate * SAMPLE_WIDTH + super().bytesAvailable()
+
+    def readData(self, maxlen):
+        return self.mixer.render(maxlen // SAMPLE_WIDTH)
+
+    def writeData(self, data):
+        return -1
+
+
+def cue_format(rate):
+    fmt = QAudioFormat()
+    fmt.setSampleRate(rate)
+    fmt.setChannelCount(1)
+    fmt.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+    return fmt
+
+
+class LoopbackCapture(QObject):
+    # Records an input device (a loopback / "Stereo Mix" / monitor device, or a
+    # microphone next to the speakers) for latency_calibration.py. Chunks are
+    # stamped with the monotonic time their first sample was captured.
+
+    def __init__(self, rate, device_info=None):
+        super().__init__()
+        self.rate = rate
+        self.device_info = device_info or QMediaDevices.defaultAudioInput()
+        self.source = None
+        self.io = None
+        self.chunks = []
+
+    def start_capture(self):
+        self.chunks = []
+        self.source = QAudioSource(self.device_info, cue_format(self.rate))
+        self.io = self.source.start()
+        self.io.readyRead.connect(self._read)
+
+    def stop_capture(self):
+        if self.source is not None:
+            self._read()
+            self.source.stop()
+            self.source = None
+            self.io = None
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+    def _read(self):
+        data = bytes(self.io.readAll())
+        if not data:
+            return
+        now_ns = time.monotonic_ns()
+        samples = array('h')
+        samples.frombytes(data[:len(data) // SAMPLE_WIDTH * SAMPLE_WIDTH])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        # The last sample of the chunk arrived just now
+        self.chunks.append((now_ns - len(samples) * 1_000_000_000 // self.rate, samples))
+
+
+class CueOutput(QObject):
+    # One always-open QAudioSink for every cue, buffer sized from the latency budget.
+    # The sink lives on its own thread so a busy GUI thread cannot starve it.
+
+    def __init__(self, mixer, buffer_ms=BUFFER_MS):
+        super().__init__()
+        self.mixer = mixer
+        self.requested_buffer_ms = buffer_ms
+        self.device_info = QMediaDevices.defaultAudioOutput()
+        self.sink = None
+        self.source = None
+
+        self.thread = QThread()
+        self.thread.setObjectName("CueAudio")
+        self.moveToThread(self.thread)
+        self.thread.started.connect(self._open)
+        self.thread.start(QThread.Priority.TimeCriticalPriority)
+
+    @property
+    def device_name(self):
+        # Key for the per-device calibration in settings.json
+        return self.device_info.description()
+
+    def loopback_capture(self):
+        return LoopbackCapture(self.mixer.rate)
+
+    @property
+    def buffer_ms(self):
+        if self.sink is None:
+            return self.requested_buffer_ms
+        return self.sink.bufferSize() * 1000 / (self.mixer.rate * SAMPLE_WIDTH)
+
+    @pyqtSlot()
+    def _open(self):
+        self.sink = QAudioSink(self.device_info, cue_format(self.mixer.rate))
+        self.sink.setBufferSize(self.mixer.rate * SAMPLE_WIDTH * self.requested_buffer_ms // 1000)
+        self.source = MixerDevice(self.mixer)
+        self.sink.start(self.source)
+
+    @pyqtSlot()
+    def _close(self):
+        if self.sink is not None:
+            self.sink.stop()
+            self.source.close()
+
+    def stop(self):
+        QMetaObject.invokeMethod(self, "_close", Qt.ConnectionType.BlockingQueuedConnection)
+        self.thread.quit()
+        self.thread.wait()
@@ -0,0 +1,65 @@
+# Trigger-to-sound latency of the in-memory cue mixer, plus the start error of
+# pre-scheduled cues.
+# Runs without Qt: a NullSink pulls the stream in real time like a sound card.
+#
+#   python benchmarks/bench_audio.py [triggers]
+import os
+import sys
+import json
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cue_audio import CueMixer, NullSink, LATENCY_BUDGET_MS
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(triggers=200):
+    mixer = CueMixer()
+    t0 = time.perf_counter()
+    for name in ("count.wav", "end.wav", "warning_5s_red.wav", "warning_5s_yellow.wav"):
+        mixer.load(name, os.path.join(ROOT, "sounds", name))
+    decode_ms = (time.perf_counter() - t0) * 1000
+
+    sink = NullSink(mixer)
+    sink.start()
+    rng = random.Random(7)
+    keys = list(mixer.buffers)
+    for _ in range(triggers):
+        mixer.trigger(rng.choice(keys))
+        time.sleep(rng.uniform(0.005, 0.03))
+    time.sleep(0.1)
+
+    # Pre-scheduled cues should start on their exact frame regardless of jitter
+    start_ns = time.monotonic_ns() + 50_000_000
+    mixer.schedule([(start_ns + i * 37_000_000, keys[i % len(keys)]) for i in range(40)])
+    time.sleep(40 * 0.037 + 0.2)
+    sink.stop()
+    lateness = [n / 1e6 for n in mixer.schedule_lateness]
+
+    # Sound reaches the speaker once the rendered block has drained the sink buffer
+    latencies = [d / 1e6 + sink.buffer_ms for d in mixer.start_delays]
+    return {
+        "benchmark": "cue_trigger_to_sound",
+        "triggers": len(latencies),
+        "decode_ms": round(decode_ms, 2),
+        "budget_ms": LATENCY_BUDGET_MS,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+        "within_budget": max(latencies) <= LATENCY_BUDGET_MS,
+        "scheduled_cues": len(lateness),
+        "scheduled_max_late_ms": round(max(lateness), 3) if lateness else None,
+    }
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(json.dumps(run(count), indent=2))
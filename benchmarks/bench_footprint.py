@@ -0,0 +1,99 @@
+# Memory and CPU of the window build next to `main.py --headless`, each with
+# a countdown running for the same time. Both run in a fresh child process
+# with the null audio sink, so only the app itself is measured.
+#
+#   python benchmarks/bench_footprint.py [seconds]
+import os
+import sys
+import json
+import time
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHILD_ENV = {
+    "QT_QPA_PLATFORM": "offscreen",
+    "RUBE_TIMER_AUDIO": "null",
+    "RUBE_TIMER_LOG": "0",
+    "RUBE_TIMER_SHARED_STATE": "0",
+}
+
+
+def rss_mb():
+    # Current resident set size of this process
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # peak rather than current where /proc is missing
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def child(mode, seconds):
+    # Runs one build for `seconds` with a timer going and prints a JSON report
+    if mode == "gui":
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+        from main import CountdownTimerApp
+
+        app = QApplication(sys.argv[:1])
+        window = CountdownTimerApp()
+        window.show()
+        window.start_timer()
+        start_rss = rss_mb()
+        cpu0 = time.process_time()
+        QTimer.singleShot(int(seconds * 1000), app.quit)
+        app.exec()
+    else:
+        from headless import HeadlessTimer
+
+        timer = HeadlessTimer(ROOT, "null")
+        timer._interactive = False
+        timer.command("start")
+        start_rss = rss_mb()
+        cpu0 = time.process_time()
+        timer.run(duration=seconds)
+    cpu = time.process_time() - cpu0
+    print(json.dumps({
+        "rss_mb": round(rss_mb(), 1),
+        "rss_at_start_mb": round(start_rss, 1),
+        "cpu_percent": round(cpu * 100 / seconds, 2),
+        "modules": len(sys.modules),
+        "qtwidgets_loaded": "PyQt6.QtWidgets" in sys.modules,
+    }))
+
+
+def run(seconds=10):
+    env = dict(os.environ)
+    env.update(CHILD_ENV)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        env.setdefault("PYNPUT_BACKEND", "dummy")
+    results = {"seconds": seconds}
+    for mode in ("gui", "headless"):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(seconds)],
+                             capture_output=True, text=True, env=env, cwd=ROOT, timeout=seconds + 60)
+        reports = [line for line in out.stdout.splitlines() if line.startswith("{")]
+        if not reports:
+            raise RuntimeError(f"{mode} child failed: {out.stderr[-500:]}")
+        results[mode] = json.loads(reports[-1])
+    results["rss_saved_mb"] = round(results["gui"]["rss_mb"] - results["headless"]["rss_mb"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], float(sys.argv[3]))
+        sys.exit(0)
+    results = run(float(sys.argv[1]) if len(sys.argv) > 1 else 10)
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if results["headless"]["qtwidgets_loaded"] else 0)
@@ -0,0 +1,107 @@
+# Load test for TimerScheduler: hundreds of concurrent countdowns on one clock.
+# Compares the cost per fired cue of heap-driven wake-ups against updating
+# every timer on a fixed 10 ms tick, for growing timer counts.
+# Runs on a simulated clock, so an hour of raid time takes well under a minute.
+#
+#   python benchmarks/bench_scheduler.py [seconds]
+import os
+import sys
+import json
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from timer_engine import SimulatedClock, TimerSettings, MODE_CIRCLEC, NS_PER_SEC
+from timer_scheduler import TimerScheduler
+
+TIMER_COUNTS = (10, 100, 1000)
+TICK_MS = 10
+
+
+def build(count, clock, seed=11):
+    # Mix of label 3 cycles, CircleC loops and ad-hoc cooldowns with random
+    # lengths, started at staggered times
+    rng = random.Random(seed)
+    scheduler = TimerScheduler(clock)
+    shared = TimerSettings()
+    for i in range(count):
+        kind = i % 3
+        if kind == 2:
+            cooldown = TimerSettings()
+            cooldown.presets = [{'label': 'cd', 'time': rng.uniform(8.0, 90.0), 'first_time': rng.uniform(5.0, 30.0)}]
+            scheduler.add(i, cooldown)
+        else:
+            scheduler.add(i, shared, preset_index=2 if kind == 0 else rng.randrange(2))
+        scheduler.start(i, MODE_CIRCLEC if kind == 1 and i % 2 else None,
+                        start_ns=clock.now_ns + rng.randrange(0, 20 * NS_PER_SEC))
+    return scheduler
+
+
+def run_heap(count, seconds):
+    clock = SimulatedClock()
+    scheduler = build(count, clock)
+    end_ns = clock.now_ns + seconds * NS_PER_SEC
+    cues = wakes = 0
+    t0 = time.perf_counter()
+    while True:
+        wake_ns = scheduler.next_wake_ns()
+        if wake_ns is None or wake_ns > end_ns:
+            break
+        clock.now_ns = wake_ns
+        cues += len(scheduler.run_due())
+        wakes += 1
+    elapsed = time.perf_counter() - t0
+    return cues, wakes, elapsed
+
+
+def run_tick(count, seconds):
+    # Baseline: every timer updated on every tick, like one QTimer per countdown
+    clock = SimulatedClock()
+    scheduler = build(count, clock)
+    engines = list(scheduler.timers.values())
+    end_ns = clock.now_ns + seconds * NS_PER_SEC
+    cues = ticks = 0
+    t0 = time.perf_counter()
+    while clock.now_ns < end_ns:
+        clock.now_ns += TICK_MS * 1_000_000
+        for engine in engines:
+            cues += len(engine.update(clock.now_ns))
+        ticks += 1
+    elapsed = time.perf_counter() - t0
+    return cues, ticks, elapsed
+
+
+def run(seconds=600):
+    results = {"simulated_seconds": seconds, "tick_ms": TICK_MS, "timers": {}}
+    for count in TIMER_COUNTS:
+        cues, wakes, heap_s = run_heap(count, seconds)
+        entry = {
+            "cues": cues,
+            "wakes": wakes,
+            "heap_total_ms": round(heap_s * 1000, 2),
+            "heap_us_per_cue": round(heap_s * 1e6 / max(1, cues), 3),
+        }
+        # The fixed tick baseline is O(timers x ticks); keep it short for big counts
+        tick_seconds = seconds if count <= 100 else max(10, seconds // 10)
+        tick_cues, ticks, tick_s = run_tick(count, tick_seconds)
+        entry.update({
+            "tick_simulated_seconds": tick_seconds,
+            "tick_us_per_cue": round(tick_s * 1e6 / max(1, tick_cues), 3),
+            "tick_us_per_tick": round(tick_s * 1e6 / max(1, ticks), 3),
+        })
+        results["timers"][count] = entry
+
+    # Per-cue cost must stay flat (log n), not grow with the number of timers
+    per_cue = [results["timers"][n]["heap_us_per_cue"] for n in TIMER_COUNTS]
+    results["heap_cost_growth"] = round(per_cue[-1] / per_cue[0], 2)
+    results["scales"] = results["heap_cost_growth"] < TIMER_COUNTS[-1] / TIMER_COUNTS[0] / 10
+    return results
+
+
+if __name__ == "__main__":
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    results = run(seconds)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["scales"] else 1)
@@ -0,0 +1,240 @@
+# Headless benchmark suite for the timer, input and audio hot paths.
+#
+# Runs on Linux without a display or sound card: Qt uses the offscreen
+# platform, cues go to the null audio sink and pynput falls back to its dummy
+# backend when no X display is available.
+#
+#   python benchmarks/run_benchmarks.py --output results.json
+#   python benchmarks/run_benchmarks.py --compare baseline.json   # exit 1 on regression
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("RUBE_TIMER_AUDIO", "null")
+# Time the app itself, not the session log writer or the shared state file
+os.environ["RUBE_TIMER_LOG"] = "0"
+os.environ["RUBE_TIMER_SHARED_STATE"] = "0"
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+# A metric regresses when it grows by more than this factor over the baseline
+# and by more than MIN_REGRESSION_MS in absolute terms. max_ms is reported but
+# too noisy to gate on.
+REGRESSION_FACTOR = 1.2
+MIN_REGRESSION_MS = 0.05
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(values_ms):
+    return {
+        "mean_ms": round(sum(values_ms) / len(values_ms), 4),
+        "p50_ms": round(percentile(values_ms, 50), 4),
+        "p95_ms": round(percentile(values_ms, 95), 4),
+        "max_ms": round(max(values_ms), 4),
+    }
+
+
+def pump(app, seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def bench_tick_jitter(app, window, seconds=3.0):
+    stamps = []
+    original = window.update_timer
+
+    def timed_tick():
+        stamps.append(time.perf_counter_ns())
+        original()
+
+    window.timer.timeout.disconnect()
+    window.timer.timeout.connect(timed_tick)
+    window.start_timer()
+    pump(app, seconds)
+    window.stop_timer()
+    window.timer.timeout.disconnect()
+    window.timer.timeout.connect(window.update_timer)
+
+    interval = window.timer.interval()
+    jitter = [abs((b - a) / 1e6 - interval) for a, b in zip(stamps, stamps[1:])]
+    result = summarize(jitter)
+    result.update({"ticks": len(stamps), "interval_ms": interval})
+    return result
+
+
+def bench_call(func, calls):
+    samples = []
+    for i in range(calls):
+        t0 = time.perf_counter_ns()
+        func(i)
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    return summarize(samples)
+
+
+def bench_display(app, window, calls=2000):
+    window.start_timer()
+    result = bench_call(lambda i: window.update_display(), calls)
+    window.stop_timer()
+    return result
+
+
+def bench_warning_visuals(app, window, calls=600):
+    states = ("red", "yellow", "none")
+
+    def switch(i):
+        window.set_warning_visuals(states[i % 3])
+        window.display.repaint()
+
+    return bench_call(switch, calls)
+
+
+def bench_session_log(app, window, calls=20000):
+    # One cue record, as handle_cue writes it on the tick
+    from session_log import EV_CUE
+
+    log = window.session_log.log
+    return bench_call(lambda i: log(EV_CUE, 1, i, 0, 7), calls)
+
+
+def bench_hotkey(app, window, presses=50):
+    from types import SimpleNamespace
+
+    key = SimpleNamespace(name=window.start_hotkey)
+    delays = []
+    for _ in range(presses):
+        window.stop_timer()
+        press = threading.Thread(target=window.hotkeys._on_press, args=(key,))
+        press.start()
+        press.join()
+        end = time.perf_counter() + 1.0
+        while not window.is_running and time.perf_counter() < end:
+            app.processEvents()
+        delays.append(window.last_hotkey_delay_ms)
+    window.stop_timer()
+    return summarize(delays)
+
+
+def bench_cold_start(runs=3):
+    samples = []
+    imports = []
+    for _ in range(runs):
+        t0 = time.monotonic_ns()
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--cold-start-child"],
+                             capture_output=True, text=True, env=os.environ.copy(), timeout=60)
+        painted = [line for line in out.stdout.splitlines() if line.startswith("FIRST_PAINT ")]
+        if not painted:
+            raise RuntimeError(f"cold start child failed: {out.stderr[-500:]}")
+        samples.append((int(painted[0].split()[1]) - t0) / 1e6)
+        imports += [float(line.split()[1]) for line in out.stdout.splitlines() if line.startswith("IMPORT_MS ")]
+    result = summarize(samples)
+    if imports:
+        result["import_ms"] = round(sum(imports) / len(imports), 4)
+    return result
+
+
+def cold_start_child():
+    # Prints the monotonic time of the first paint of the main window
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                print(f"IMPORT_MS {(main.IMPORT_DONE - main.STARTUP_T0) * 1000:.3f}", flush=True)
+                print(f"FIRST_PAINT {time.monotonic_ns()}", flush=True)
+                os._exit(0)
+            return False
+
+    app = QApplication(sys.argv)
+    window = main.CountdownTimerApp()
+    watcher = FirstPaint()
+    window.installEventFilter(watcher)
+    window.show()
+    app.exec()
+
+
+def run_all():
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    import bench_audio
+
+    app = QApplication(sys.argv)
+    window = main.CountdownTimerApp()
+    window.show()
+    pump(app, 0.2)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "tick_jitter": bench_tick_jitter(app, window),
+        "update_display": bench_display(app, window),
+        "set_warning_visuals": bench_warning_visuals(app, window),
+        "session_log_record": bench_session_log(app, window),
+        "hotkey_to_start": bench_hotkey(app, window),
+        "cue_to_play": bench_audio.run(100),
+    }
+    window.close()
+    results["cold_start_first_paint"] = bench_cold_start()
+    return results
+
+
+def compare(results, baseline):
+    # Flags every gated *_ms metric that got slower than the baseline
+    regressions = []
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if name == "meta" or not isinstance(old, dict):
+            continue
+        for key, value in metrics.items():
+            if not key.endswith("_ms") or key.startswith("max") or not isinstance(old.get(key), (int, float)):
+                continue
+            if value > old[key] * REGRESSION_FACTOR and value - old[key] > MIN_REGRESSION_MS:
+                regressions.append(f"{name}.{key}: {old[key]} -> {value}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if "--cold-start-child" in sys.argv:
+        cold_start_child()
+        sys.exit(0)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Rube countdown timer benchmarks")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    args = parser.parse_args()
+
+    results = run_all()
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
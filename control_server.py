@@ -0,0 +1,208 @@
+import json
+import math
+import socket
+import asyncio
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+# Local control and telemetry API for overlays and stream decks.
+#
+#   POST /start  /circlec  /stop        same as the buttons / hotkeys
+#   POST /preset/N                      select preset N (0-based, timer stopped)
+#   POST /nudge?seconds=-0.05           latency adjust, like the slider
+#   GET  /state                         current state as JSON
+#   GET  /events                        Server-Sent Events: the state once, then
+#                                       every change (no per-tick messages)
+#
+# The server runs its own asyncio loop on a daemon thread and only listens on
+# localhost. The GUI thread hands it a state dict with publish() when
+# something visible changed; commands come back through on_command(action,
+# value), called on the server thread (the app forwards them with a queued
+# Qt signal, like hotkey presses).
+#
+# Web pages in the user's browser can reach localhost too, so every request
+# must name a local Host (no DNS rebinding) and commands are refused when they
+# carry a non-local Origin. Only the read-only GET endpoints allow other origins.
+
+COMMANDS = ("start", "circlec", "stop")
+KEEPALIVE_S = 15.0
+# Events queued for a subscriber that stopped reading; older ones are dropped
+SUBSCRIBER_QUEUE = 64
+MAX_HEADER_BYTES = 8192
+# Largest nudge accepted in one command, the latency slider's range
+MAX_NUDGE_S = 5.0
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class ControlServer:
+
+    def __init__(self, on_command, port, host="127.0.0.1"):
+        self.on_command = on_command
+        self.host = host
+        self.port = port  # 0 picks a free port; the bound one is set by start()
+        self._state = b"{}"
+        self._subscribers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.error = None
+
+    def start(self):
+        # Returns once the socket is bound (or binding failed: see error)
+        self._thread = threading.Thread(target=self._run, name="ControlServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        return self.error is None
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    def publish(self, state):
+        # Any thread. state is a fresh dict; it is encoded on the server thread.
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._broadcast, state)
+
+    # --- Server thread ---
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            print(f"Control server failed to listen on {self.host}:{self.port}: {e}")
+            loop.close()
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._loop = None
+            self._server.close()
+            # Ends open event streams
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+
+    def _broadcast(self, state):
+        self._state = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        message = b"data: " + self._state + b"\n\n"
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if len(head) > MAX_HEADER_BYTES:
+                raise ValueError("header too large")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0) or 0)
+            if length:
+                await reader.readexactly(min(length, MAX_HEADER_BYTES))
+            url = urlsplit(target)
+            if not _is_local(headers.get("host")):
+                writer.write(_response(403, b'{"error":"not a local host"}'))
+            elif method == "GET" and url.path == "/events":
+                await self._stream(writer)
+                return
+            elif method == "POST" and "origin" in headers and not _is_local(headers["origin"], url=True):
+                writer.write(_response(403, b'{"error":"commands are local only"}'))
+            else:
+                status, body = self._route(method, url.path, parse_qs(url.query))
+                writer.write(_response(status, body, shared=method == "GET"))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method, path, query):
+        parts = [p for p in path.split("/") if p]
+        if method == "GET" and parts == ["state"]:
+            return 200, self._state
+        if method != "POST":
+            return 405, b'{"error":"use POST for commands"}'
+        try:
+            if len(parts) == 1 and parts[0] in COMMANDS:
+                self.on_command(parts[0], None)
+            elif len(parts) == 2 and parts[0] == "preset":
+                self.on_command("preset", int(parts[1]))
+            elif parts == ["nudge"]:
+                seconds = float(query["seconds"][0])
+                if not math.isfinite(seconds):
+                    raise ValueError(seconds)
+                self.on_command("nudge", max(-MAX_NUDGE_S, min(MAX_NUDGE_S, seconds)))
+            else:
+                return 404, b'{"error":"unknown command"}'
+        except (KeyError, ValueError):
+            return 400, b'{"error":"bad value"}'
+        # Accepted: the GUI thread carries it out on its next event
+        return 202, b'{"ok":true}'
+
+    async def _stream(self, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Each event is one small write; do not wait to coalesce them
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                         b"Connection: close\r\n\r\n")
+            writer.write(b"data: " + self._state + b"\n\n")
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    return
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(queue)
+
+
+def _is_local(value, url=False):
+    # Host header ("localhost:8765") or Origin ("http://127.0.0.1:5500") on this machine
+    if not value:
+        return False
+    try:
+        parts = urlsplit(value if url else "//" + value)
+        return parts.hostname in LOCAL_HOSTS and (not url or parts.scheme in ("http", "https"))
+    except ValueError:
+        return False
+
+
+def _response(status, body, shared=False):
+    # shared: readable from any origin (state only, never command replies)
+    reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+              405: "Method Not Allowed"}[status]
+    cors = "Access-Control-Allow-Origin: *\r\n" if shared else ""
+    return (f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n{cors}"
+            f"Connection: close\r\n\r\n").encode("latin-1") + body
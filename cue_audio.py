@@ -0,0 +1,454 @@
+import os
+import sys
+import time
+import wave
+import threading
+from array import array
+from collections import deque
+
+from settings_store import DEFAULT_AUDIO_SETTINGS
+
+# Every cue is decoded once into this format and mixed in memory
+SAMPLE_RATE = 44100
+SAMPLE_WIDTH = 2  # 16-bit mono
+
+# Upper bound for trigger-to-sound latency; bench_audio.py checks against it.
+# Output buffers are a third of the budget: one queued buffer, one pull period
+# and headroom for scheduling jitter.
+LATENCY_BUDGET_MS = 30
+BUFFER_MS = LATENCY_BUDGET_MS // 3
+
+MAX_VOICES = 8
+
+# Cues requested before their sound finished loading are still played once it
+# is ready, unless they are older than this by then
+STALE_CUE_MS = 1000
+
+# Pre-mixed tails: a loop's cues from its 5 s warning up to and including the
+# end sound are mixed into one buffer and started as a single voice
+TAIL_START_PREFIX = "warning_"
+TAIL_END_KEY = "end_0s"
+MAX_TAILS = 16
+
+
+def decode_wav(path, rate=SAMPLE_RATE):
+    # Returns the whole file as 16-bit mono PCM at `rate`
+    with wave.open(path, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        width = wav_file.getsampwidth()
+        src_rate = wav_file.getframerate()
+        raw = wav_file.readframes(wav_file.getnframes())
+
+    if width == 2:
+        samples = array('h')
+        samples.frombytes(raw)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+    elif width == 1:
+        samples = array('h', ((b - 128) << 8 for b in raw))
+    elif width == 3:
+        samples = array('h', (int.from_bytes(raw[i + 1:i + 3], 'little', signed=True) for i in range(0, len(raw), 3)))
+    elif width == 4:
+        wide = array('i')
+        wide.frombytes(raw)
+        if sys.byteorder == 'big':
+            wide.byteswap()
+        samples = array('h', (v >> 16 for v in wide))
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+
+    if channels > 1:
+        samples = array('h', (sum(samples[i:i + channels]) // channels for i in range(0, len(samples), channels)))
+
+    if src_rate != rate and samples:
+        # Linear interpolation is plenty for short beeps and only runs at load
+        step = src_rate / rate
+        last = len(samples) - 1
+        out_len = int(len(samples) * rate / src_rate)
+        resampled = array('h', bytes(out_len * SAMPLE_WIDTH))
+        for i in range(out_len):
+            pos = i * step
+            j = int(pos)
+            if j >= last:
+                resampled[i] = samples[last]
+            else:
+                frac = pos - j
+                resampled[i] = int(samples[j] + (samples[j + 1] - samples[j]) * frac)
+        samples = resampled
+    return samples
+
+
+def load_cue_sounds(mixer, base_dir, audio_settings, keys=None):
+    # Decodes every cue sound (or only `keys`) into the mixer. audio_settings
+    # is the settings.json "audio" table; paths are relative to base_dir and a
+    # missing 5 s warning falls back to sounds/warning_5s.wav. Keys beyond the
+    # defaults are extra sounds for presets' own cue lists.
+    std_fallback = os.path.join(base_dir, "sounds/warning_5s.wav")
+    for key, path in dict(DEFAULT_AUDIO_SETTINGS, **audio_settings).items():
+        if keys is not None and key not in keys:
+            continue
+        path = os.path.join(base_dir, path)
+        if not os.path.exists(path) and key.startswith("warning_5s"):
+            path = std_fallback
+        if not os.path.exists(path):
+            continue
+        try:
+            mixer.load(key, path)
+        except Exception as e:
+            print(f"Failed to decode {path}: {e}")
+
+
+def mix_tail(parts, buffers, rate=SAMPLE_RATE):
+    # ((offset ns, key), ...) -> one buffer with every part at its offset.
+    # 32-bit so overlapping parts add up without clipping before volume.
+    ns_per_frame = 1_000_000_000 / rate
+    placed = [(int(round(offset_ns / ns_per_frame)), buffers[key]) for offset_ns, key in parts]
+    track = array('i', bytes(4 * max(frame + len(buf) for frame, buf in placed)))
+    filled = 0  # frames before this may already hold audio
+    for frame, buf in placed:
+        overlap = max(0, min(len(buf), filled - frame))
+        for i in range(overlap):
+            track[frame + i] += buf[i]
+        track[frame + overlap:frame + len(buf)] = array('i', buf[overlap:])
+        filled = max(filled, frame + len(buf))
+    return track
+
+
+def _tail_cues(cue):
+    # (start ns, ((offset ns, key), ...)) -> [(due ns, key), ...]
+    start_ns, parts = cue
+    return [(start_ns + offset_ns, key) for offset_ns, key in parts]
+
+
+class CueMixer:
+    # Pre-decoded cue buffers mixed into one continuous PCM stream.
+    # trigger() and schedule() are called from the GUI thread, render() from
+    # whatever pulls the audio stream (Qt sink thread, benchmark thread, ...).
+    #
+    # Scheduled cues are placed at an exact sample offset: the mixer maps the
+    # monotonic clock onto stream frames, so a cue due at t starts on the frame
+    # that reaches the speaker at t, however late the GUI thread is.
+
+    def __init__(self, rate=SAMPLE_RATE, clock=time.monotonic_ns, output_latency_ms=BUFFER_MS):
+        self.rate = rate
+        self.clock = clock
+        self.output_latency_ns = int(output_latency_ms * 1_000_000)
+        # Measured latency of the device behind the buffer (latency_calibration.py);
+        # scheduled cues are rendered this much earlier
+        self.device_latency_ns = 0
+        self.buffers = {}
+        self.volume = 0.5
+        self.frames_rendered = 0
+        # ns between trigger() and the render() call that emitted its first sample
+        self.start_delays = deque(maxlen=4096)
+        # ns a scheduled cue started after its due time (0 when sample-accurate)
+        self.schedule_lateness = deque(maxlen=4096)
+        self._voices = []
+        self._schedule = []
+        self._pending = []  # (trigger ns, key) asked for before the key was loaded
+        self._started = deque(maxlen=64)
+        # premix: schedule() replaces each whole loop tail with one pre-mixed voice
+        self.premix = False
+        self._tails = {}  # ((offset ns, key), ...) -> array('i') mix
+        self._tails_version = 0  # bumped whenever the sounds behind the mixes change
+        self._anchor_ns = None
+        self._anchor_frame = 0
+        self._lock = threading.Lock()
+
+    def load(self, key, path):
+        # Safe to call from a loader thread while the stream is running
+        self.add_buffer(key, decode_wav(path, self.rate))
+
+    def add_buffer(self, key, buffer):
+        with self._lock:
+            self.buffers[key] = buffer
+            self._tails.clear()
+            self._tails_version += 1
+            pending = [item for item in self._pending if item[1] == key]
+            self._pending = [item for item in self._pending if item[1] != key]
+            stale_ns = self.clock() - STALE_CUE_MS * 1_000_000
+            for trigger_ns, _ in pending:
+                if trigger_ns >= stale_ns:
+                    self._started.append((trigger_ns, key))
+                    self._add_voice(buffer, trigger_ns, 0)
+
+    def remove_buffer(self, key):
+        with self._lock:
+            self.buffers.pop(key, None)
+            self._tails.clear()
+            self._tails_version += 1
+
+    def set_device_latency_ms(self, ms):
+        self.device_latency_ns = int(max(0.0, ms) * 1_000_000)
+
+    def set_volume(self, volume):
+        self.volume = max(0.0, min(1.0, volume))
+
+    def trigger(self, key):
+        with self._lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                # Not decoded yet (startup): queue it for load()
+                self._pending.append((self.clock(), key))
+                return False
+            self._add_voice(buffer, self.clock(), 0)
+        return True
+
+    def schedule(self, cues):
+        # Replaces the whole schedule with [(due monotonic ns, key), ...].
+        # Cues that already started playing keep playing and are not repeated.
+        # Keys that are still loading stay queued until render() reaches them.
+        cues = sorted(cues)
+        mixed = {}
+        if self.premix:
+            # Mix any new tails first from a snapshot of the sounds, outside
+            # the lock the audio thread needs; they are swapped in below
+            with self._lock:
+                buffers, cached, version = dict(self.buffers), set(self._tails), self._tails_version
+            loaded = lambda parts: all(key in buffers for _, key in parts)
+            for parts in self._group_tails(cues, (), loaded)[1]:
+                if parts not in cached:
+                    mixed[parts] = mix_tail(parts, buffers, self.rate)
+        with self._lock:
+            if self.premix:
+                if version == self._tails_version:
+                    for parts, track in mixed.items():
+                        self._cache_tail(parts, track)
+                # Only tails with a mix ready are grouped; others play as single cues
+                cues = self._group_tails(cues, self._started, self._tails.__contains__)[0]
+            wanted = set(cues)
+            # By time only: a tail and a single cue can share a due time, and
+            # their keys (tuple, str) do not compare
+            self._schedule = sorted(
+                (cue for cue in dict.fromkeys(cues) if cue not in self._started and cue not in self._pending),
+                key=lambda cue: cue[0])
+            # A playing tail whose loop moved (latency nudge) is cut; the
+            # remaining cues of that loop arrive individually in `cues`
+            self._cut_tails(wanted)
+
+    def clear_schedule(self):
+        # Also drops cues still waiting for their sound to load, so nothing
+        # from before a STOP or preset change plays afterwards
+        with self._lock:
+            self._schedule = []
+            self._pending = []
+            self._cut_tails(None)
+
+    def set_premix(self, enabled):
+        with self._lock:
+            self.premix = enabled
+            if not enabled:
+                self._tails.clear()
+
+    def tail_track(self, parts):
+        # One buffer with every part at its offset; cached until sounds change
+        with self._lock:
+            track = self._tails.get(parts)
+            if track is not None:
+                return track
+            buffers, version = dict(self.buffers), self._tails_version
+        track = mix_tail(parts, buffers, self.rate)
+        with self._lock:
+            if version == self._tails_version:
+                self._cache_tail(parts, track)
+        return track
+
+    def _cache_tail(self, parts, track):
+        # Caller holds the lock
+        if parts not in self._tails and len(self._tails) >= MAX_TAILS:
+            self._tails.pop(next(iter(self._tails)))
+        self._tails[parts] = track
+
+    @staticmethod
+    def _group_tails(cues, started, ready):
+        # [(ns, key)] -> (same list with each complete, not yet started loop
+        # tail (warning ... end) for which ready(parts) holds replaced by
+        # (warning ns, parts), [parts of every such tail])
+        grouped = []
+        tails = []
+        group = None
+        for at_ns, key in cues:
+            if isinstance(key, str) and key.startswith(TAIL_START_PREFIX) and (at_ns, key) not in started:
+                grouped.extend(group or ())
+                group = [(at_ns, key)]
+                continue
+            if group is None:
+                grouped.append((at_ns, key))
+                continue
+            group.append((at_ns, key))
+            if key == TAIL_END_KEY:
+                start_ns = group[0][0]
+                parts = tuple((ns - start_ns, k) for ns, k in group)
+                if ready(parts):
+                    grouped.append((start_ns, parts))
+                    tails.append(parts)
+                else:
+                    grouped.extend(group)
+                group = None
+        grouped.extend(group or ())
+        return grouped, tails
+
+    def _cut_tails(self, keep):
+        # Keeps a playing tail while the new schedule still has its unplayed
+        # cues at the same times (or it has nothing left but its end sound
+        # ringing out); keep=None cuts every tail
+        now = self.clock()
+        voices = []
+        for voice in self._voices:
+            cue = voice[4]
+            if cue is not None and isinstance(cue[1], tuple):
+                if keep is None:
+                    continue
+                ahead = [part for part in _tail_cues(cue) if part[0] > now]
+                if ahead and cue not in keep and not keep.intersection(ahead):
+                    continue
+            voices.append(voice)
+        self._voices = voices
+
+    def _buffer_for(self, key):
+        if isinstance(key, tuple):
+            return self._tails.get(key)
+        return self.buffers.get(key)
+
+    def stop_all(self):
+        with self._lock:
+            self._voices = []
+            self._schedule = []
+            self._pending = []
+
+    def frame_at(self, at_ns):
+        # Stream frame that reaches the speaker at at_ns
+        return self._anchor_frame + (at_ns - self._anchor_ns) * self.rate // 1_000_000_000
+
+    def render(self, frames):
+        with self._lock:
+            now = self.clock()
+            first = self.frames_rendered
+            self.frames_rendered += frames
+            # Frames rendered now are heard one output buffer later. Re-anchor
+            # on the first block and whenever an underrun broke the mapping.
+            heard_ns = now + self.output_latency_ns + self.device_latency_ns
+            drift = abs(self.frame_at(heard_ns) - first) if self._anchor_ns is not None else None
+            if drift is None or drift > self.rate * 2 * self.output_latency_ns // 1_000_000_000:
+                self._anchor_ns = heard_ns
+                self._anchor_frame = first
+
+            while self._schedule:
+                at_ns, key = self._schedule[0]
+                frame = self.frame_at(at_ns)
+                if frame >= first + frames:
+                    break
+                self._schedule.pop(0)
+                buffer = self._buffer_for(key)
+                if buffer is None and isinstance(key, tuple):
+                    # Its mix was dropped (a sound reloaded, or evicted):
+                    # play the parts as single cues instead
+                    self._schedule = sorted(self._schedule + _tail_cues((at_ns, key)), key=lambda cue: cue[0])
+                    continue
+                if buffer is None:
+                    self._pending.append((at_ns, key))
+                    continue
+                if now - at_ns > STALE_CUE_MS * 1_000_000:
+                    continue
+                self._started.append((at_ns, key))
+                if isinstance(key, tuple):
+                    # Its cues count as started so a later schedule() of the
+                    # same loop without the warning does not repeat them
+                    self._started.extend(_tail_cues((at_ns, key)))
+                offset = max(0, frame - first)
+                late = max(0, first - frame)
+                self.schedule_lateness.append(late * 1_000_000_000 // self.rate)
+                # A late tail skips what should already have played, so its
+                # count and end beeps stay on their own due frames
+                self._add_voice(buffer, None, offset, (at_ns, key), late if isinstance(key, tuple) else 0)
+
+            if not self._voices:
+                return bytes(frames * SAMPLE_WIDTH)
+            mix = [0] * frames
+            active = []
+            for voice in self._voices:
+                buffer, pos, trigger_ns, offset, _ = voice
+                if pos == 0 and trigger_ns is not None:
+                    self.start_delays.append(now - trigger_ns)
+                    voice[2] = None
+                chunk = buffer[pos:pos + frames - offset]
+                for i, value in enumerate(chunk, offset):
+                    mix[i] += value
+                voice[1] = pos + len(chunk)
+                voice[3] = 0
+                if voice[1] < len(buffer):
+                    active.append(voice)
+            self._voices = active
+
+        volume = self.volume
+        out = array('h', (max(-32768, min(32767, int(v * volume))) for v in mix))
+        if sys.byteorder == 'big':
+            out.byteswap()
+        return out.tobytes()
+
+    def _add_voice(self, buffer, trigger_ns, offset, cue=None, pos=0):
+        if len(self._voices) >= MAX_VOICES:
+            self._voices.pop(0)
+        # [samples, position, trigger time, start offset in the next block, scheduled (ns, key)]
+        self._voices.append([buffer, pos, trigger_ns, offset, cue])
+
+
+class NullSink:
+    # Pulls from the mixer in real time like a sound card would, but discards
+    # the audio. Used for benchmarks and machines without an output device.
+    #
+    # It doubles as the offline test device for latency calibration: the
+    # capture hands back what was rendered, stamped with when a device with
+    # device_latency_ms of extra delay would have played it.
+
+    device_name = "null"
+
+    def __init__(self, mixer, period_ms=BUFFER_MS, device_latency_ms=0):
+        self.mixer = mixer
+        self.period_ms = period_ms
+        self.device_latency_ms = device_latency_ms
+        self._thread = None
+        self._running = False
+        self._capture = None
+
+    @property
+    def buffer_ms(self):
+        return self.period_ms
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def start_capture(self):
+        self._capture = []
+
+    def stop_capture(self):
+        # [(monotonic ns the chunk's first sample is heard, array of samples)]
+        chunks, self._capture = self._capture or [], None
+        return chunks
+
+    def _run(self):
+        frames = self.mixer.rate * self.period_ms // 1000
+        period_ns = self.period_ms * 1_000_000
+        next_ns = time.perf_counter_ns()
+        while self._running:
+            rendered_ns = time.monotonic_ns()
+            data = self.mixer.render(frames)
+            capture = self._capture
+            if capture is not None:
+                samples = array('h')
+                samples.frombytes(data)
+                if sys.byteorder == 'big':
+                    samples.byteswap()
+                capture.append((rendered_ns + (self.period_ms + self.device_latency_ms) * 1_000_000, samples))
+            next_ns += period_ns
+            delay = (next_ns - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
@@ -0,0 +1,151 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRect, QRectF
+from PyQt6.QtGui import QPainter, QPixmap, QColor, QFont, QFontMetrics, QPen, QBrush, QLinearGradient
+
+# Colours match the old DisplayFrame / TimeLabel / ProgressBar rules in style.qss
+THEME_COLORS = {
+    "none": {"border": "#3ca4ff", "text": "#d1e8ff"},
+    "red": {"border": "#ff4444", "text": "#ff4444"},
+    "yellow": {"border": "#ffec3d", "text": "#ffec3d"},
+}
+BACKGROUND = "#111317"
+BAR_BACKGROUND = "#1a1e24"
+BAR_CHUNK_STOPS = ("#ffaa00", "#ff4444")  # Yellow to red gradient
+
+GLYPHS = "0123456789."
+
+
+class DisplayTheme:
+    # Pens/brushes for one warning state, built once so switching is a lookup
+
+    def __init__(self, colors):
+        self.border_pen = QPen(QColor(colors["border"]), 3)
+        self.bar_pen = QPen(QColor(colors["border"]), 2)
+        self.text_color = QColor(colors["text"])
+
+
+class CountdownDisplay(QWidget):
+    # Painted replacement for the DisplayFrame + TimeLabel + QProgressBar trio.
+    # Digits come from per-theme pixmap caches with a fixed advance, and the
+    # warning state only swaps the pre-built theme, so nothing is re-polished.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("CountdownDisplay")
+
+        self.digit_font = QFont("Courier New")
+        self.digit_font.setStyleHint(QFont.StyleHint.Monospace)
+        self.digit_font.setPixelSize(80)
+        self.digit_font.setBold(True)
+
+        self.themes = {name: DisplayTheme(colors) for name, colors in THEME_COLORS.items()}
+        self.background_brush = QBrush(QColor(BACKGROUND))
+        self.bar_background_brush = QBrush(QColor(BAR_BACKGROUND))
+        self.status = "none"
+        self.text = "00.00"
+        self.value = 1000  # 0..1000 like the old progress bar range
+        self._glyph_cache = {}
+        metrics = QFontMetrics(self.digit_font)
+        self._glyph_width = max(metrics.horizontalAdvance(ch) for ch in GLYPHS)
+
+    # --- State ---
+
+    def set_warning(self, status):
+        if status == self.status or status not in self.themes:
+            return
+        self.status = status
+        self.update()
+
+    def set_text(self, text):
+        if text == self.text:
+            return
+        self.text = text
+        self.update(self.text_rect())
+
+    def set_value(self, value):
+        value = max(0, min(1000, value))
+        if value == self.value:
+            return
+        self.value = value
+        self.update(self.bar_rect())
+
+    def bar_width(self):
+        return self.bar_rect().width()
+
+    # --- Geometry ---
+
+    def bar_rect(self):
+        return QRect(13, self.height() - 33, self.width() - 26, 20)
+
+    def text_rect(self):
+        return QRect(13, 13, self.width() - 26, self.height() - 50)
+
+    # --- Painting ---
+
+    def showEvent(self, event):
+        # Render every theme's digits up front so the first warning costs nothing
+        for status in self.themes:
+            self.glyphs(status)
+        super().showEvent(event)
+
+    def glyphs(self, status):
+        # One pixmap per character and theme, cached per device pixel ratio
+        ratio = self.devicePixelRatioF()
+        key = (status, ratio)
+        cache = self._glyph_cache.get(key)
+        if cache is None:
+            metrics = QFontMetrics(self.digit_font)
+            height = metrics.height()
+            cache = {}
+            for ch in GLYPHS:
+                pixmap = QPixmap(int(self._glyph_width * ratio), int(height * ratio))
+                pixmap.setDevicePixelRatio(ratio)
+                pixmap.fill(Qt.GlobalColor.transparent)
+                painter = QPainter(pixmap)
+                painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+                painter.setFont(self.digit_font)
+                painter.setPen(self.themes[status].text_color)
+                painter.drawText(QRect(0, 0, self._glyph_width, height), Qt.AlignmentFlag.AlignCenter, ch)
+                painter.end()
+                cache[ch] = pixmap
+            self._glyph_cache[key] = cache
+        return cache
+
+    def paintEvent(self, event):
+        theme = self.themes[self.status]
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Frame
+        painter.setPen(theme.border_pen)
+        painter.setBrush(self.background_brush)
+        painter.drawRoundedRect(QRectF(self.rect()).adjusted(1.5, 1.5, -1.5, -1.5), 15, 15)
+
+        # Digits
+        glyphs = self.glyphs(self.status)
+        area = self.text_rect()
+        first = next(iter(glyphs.values()))
+        glyph_height = first.height() / first.devicePixelRatio()
+        x = area.x() + (area.width() - self._glyph_width * len(self.text)) // 2
+        y = area.y() + int((area.height() - glyph_height) / 2)
+        for ch in self.text:
+            pixmap = glyphs.get(ch)
+            if pixmap is not None:
+                painter.drawPixmap(x, y, pixmap)
+            x += self._glyph_width
+
+        # Progress bar
+        bar = QRectF(self.bar_rect())
+        painter.setPen(theme.bar_pen)
+        painter.setBrush(self.bar_background_brush)
+        painter.drawRoundedRect(bar.adjusted(1, 1, -1, -1), 10, 10)
+        fill_width = (bar.width() - 8) * self.value / 1000
+        if fill_width > 0:
+            chunk = QRectF(bar.x() + 4, bar.y() + 4, fill_width, bar.height() - 8)
+            gradient = QLinearGradient(chunk.left(), 0, chunk.right(), 0)
+            gradient.setColorAt(0, QColor(BAR_CHUNK_STOPS[0]))
+            gradient.setColorAt(1, QColor(BAR_CHUNK_STOPS[1]))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QBrush(gradient))
+            painter.drawRoundedRect(chunk, 8, 8)
+        painter.end()
@@ -0,0 +1,43 @@
+DEFAULT_REFRESH_HZ = 60.0
+
+_UNSET = object()
+
+
+def frame_interval_ms(refresh_hz):
+    # One display refresh, never faster than the 0.01 s the label can show
+    if not refresh_hz or refresh_hz <= 0:
+        refresh_hz = DEFAULT_REFRESH_HZ
+    return max(10, int(1000 / refresh_hz))
+
+
+class DirtyTracker:
+    # Remembers what is on screen so a frame only touches widgets whose
+    # visible output (displayed string, bar fill in pixels) actually changed.
+
+    def __init__(self):
+        self.drawn = 0
+        self.skipped = 0
+        self._values = {}
+
+    def changed(self, key, value):
+        if self._values.get(key, _UNSET) == value:
+            return False
+        self._values[key] = value
+        return True
+
+    def frame(self, any_changed):
+        if any_changed:
+            self.drawn += 1
+        else:
+            self.skipped += 1
+
+    def invalidate(self):
+        self._values.clear()
+
+    def stats(self):
+        total = self.drawn + self.skipped
+        return {
+            "drawn": self.drawn,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+        }
@@ -1,34 +1,173 @@
 import os
-import wave
-import struct
+import sys
+import json
 import math
+import wave
+import hashlib
+import argparse
+from array import array
 
-def generate_tone(filename, frequency, duration, volume=0.5, sample_rate=44100):
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with wave.open(filename, 'w') as wav_file:
-        wav_file.setnchannels(1) # Mono
-        wav_file.setsampwidth(2) # 2 bytes per sample (16-bit)
-        wav_file.setframerate(sample_rate)
-        
-        num_samples = int(duration * sample_rate)
-        for i in range(num_samples):
-            # Sine wave
-            value = int(volume * 32767.0 * math.sin(2.0 * math.pi * frequency * i / sample_rate))
-            # Pack value as 16-bit integer
-            data = struct.pack('<h', value)
-            wav_file.writeframesraw(data)
+try:
+    import numpy as np
+except ImportError:
+    # Optional. The array path below builds the same tones and envelopes and
+    # rounds once, half to even, like np.rint; the two sine implementations can
+    # still leave a sample 1 LSB apart.
+    np = None
 
-if __name__ == "__main__":
+SAMPLE_RATE = 44100
+# Bump when the synthesis itself changes so every file is rebuilt once
+SYNTH_VERSION = 1
+MANIFEST = ".generated.json"
+
+# Shared defaults for every cue; a cue may override any of them
+DEFAULTS = {"volume": 0.5, "attack_ms": 5, "release_ms": 20}
+
+# One entry per file in DEFAULT_AUDIO_SETTINGS (plus the warning_5s.wav fallback).
+# notes: [(whole-Hz frequencies, seconds)]; several frequencies play as a
+# chord, none is a rest. Each note gets its own attack/release envelope.
+CUES = {
     # Red Warning (Lower pitch, urgent)
-    generate_tone("sounds/warning_5s_red.wav", frequency=440, duration=0.5, volume=0.5)
-    
+    "warning_5s_red.wav": {"notes": [((440,), 0.5)]},
     # Yellow Warning (Higher pitch, noticeably different)
-    generate_tone("sounds/warning_5s_yellow.wav", frequency=880, duration=0.5, volume=0.5)
-    
+    "warning_5s_yellow.wav": {"notes": [((880,), 0.5)]},
+    # Fallback for any 5s warning without its own file
+    "warning_5s.wav": {"notes": [((660,), 0.5)]},
+    # CircleC: two short fifths
+    "warning_5s_circleC.wav": {"notes": [((660, 990), 0.2), ((), 0.06), ((660, 990), 0.2)]},
+    # Label 3 CircleC slow floor: two long low beeps
+    "warning_5s_slow.wav": {"notes": [((523,), 0.3), ((), 0.12), ((523,), 0.3)]},
+    # Label 3 CircleC fast floor: four quick high beeps
+    "warning_5s_fast.wav": {"notes": [((784,), 0.08), ((), 0.04)] * 3 + [((784,), 0.08)]},
+    # Label 3 START rainbow: rising arpeggio
+    "warning_5s_rainbow.wav": {"notes": [((523,), 0.12), ((659,), 0.12), ((784,), 0.12), ((1047,), 0.22)]},
     # 3, 2, 1 count ("Po")
-    generate_tone("sounds/count.wav", frequency=1000, duration=0.1, volume=0.5)
-    
+    "count.wav": {"notes": [((1000,), 0.1)]},
     # 0 end ("Poon")
-    generate_tone("sounds/end.wav", frequency=1500, duration=0.8, volume=0.5)
-    
-    print("Dummy audio files generated in 'sounds' folder.")
+    "end.wav": {"notes": [((1500,), 0.8)], "release_ms": 200},
+}
+
+
+def cue_spec(name, rate=SAMPLE_RATE):
+    spec = dict(DEFAULTS)
+    spec.update(CUES[name])
+    spec["rate"] = rate
+    spec["version"] = SYNTH_VERSION
+    return spec
+
+
+def spec_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _note_numpy(freqs, count, rate, volume, attack, release):
+    t = np.arange(count) / rate
+    wave_ = np.zeros(count)
+    for freq in freqs:
+        wave_ += np.sin(2.0 * math.pi * freq * t)
+    if freqs:
+        wave_ /= len(freqs)
+    envelope = np.minimum(1.0, np.minimum(np.arange(count) / attack, np.arange(count, 0, -1) / release))
+    return wave_ * envelope * (volume * 32767.0)
+
+
+def _note_array(freqs, count, rate, volume, attack, release):
+    # A tone repeats every `period` samples, so only one period is computed
+    # and the rest is tiled by array repetition; the envelope touches just the
+    # attack and release ends.
+    if not freqs or count <= 0:
+        return array('h', bytes(2 * max(0, count)))
+    period = 1
+    for freq in freqs:
+        cycle = rate // math.gcd(rate, int(freq))
+        period = period * cycle // math.gcd(period, cycle)
+    period = min(period, count)
+    steps = [2.0 * math.pi * int(freq) / rate for freq in freqs]
+    scale = volume * 32767.0 / len(freqs)
+    sin = math.sin
+
+    def tone(i):
+        return sum(sin(step * i) for step in steps) * scale
+
+    table = array('h', (round(tone(i)) for i in range(period)))
+    samples = table * (count // period + 1)
+    del samples[count:]
+    for i in list(range(min(attack, count))) + list(range(max(attack, count - release), count)):
+        # Envelope on the unrounded tone, so these round like the numpy path too
+        samples[i] = round(tone(i) * min(1.0, i / attack, (count - i) / release))
+    return samples
+
+
+def synthesize(spec):
+    # Whole cue as little-endian 16-bit PCM bytes, computed buffer by buffer
+    rate = spec["rate"]
+    attack = max(1, rate * spec["attack_ms"] // 1000)
+    release = max(1, rate * spec["release_ms"] // 1000)
+    if np is not None:
+        parts = [_note_numpy(freqs, int(seconds * rate), rate, spec["volume"], attack, release)
+                 for freqs, seconds in spec["notes"]]
+        samples = np.clip(np.rint(np.concatenate(parts)), -32768, 32767).astype("<i2")
+        return samples.tobytes()
+    samples = array('h')
+    for freqs, seconds in spec["notes"]:
+        samples.extend(_note_array(freqs, int(seconds * rate), rate, spec["volume"], attack, release))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def write_wav(path, pcm, rate):
+    # One bulk write per file
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(rate)
+        wav_file.writeframes(pcm)
+
+
+def generate_all(out_dir="sounds", names=None, force=False, rate=SAMPLE_RATE):
+    # Builds every cue whose parameters changed since the last run. Files that
+    # exist but were not made by this tool (recorded voice cues) are kept
+    # unless force is set. Returns {name: "written" | "unchanged" | "kept"}.
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    results = {}
+    for name in names or CUES:
+        spec = cue_spec(name, rate)
+        digest = spec_hash(spec)
+        path = os.path.join(out_dir, name)
+        exists = os.path.exists(path)
+        if exists and manifest.get(name) == digest and not force:
+            results[name] = "unchanged"
+        elif exists and name not in manifest and not force:
+            results[name] = "kept"
+        else:
+            write_wav(path, synthesize(spec), rate)
+            manifest[name] = digest
+            results[name] = "written"
+
+    if "written" in results.values():
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the cue sounds")
+    parser.add_argument("--out", default="sounds", help="output folder (default: sounds)")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, replacing recorded files")
+    parser.add_argument("names", nargs="*", help=f"only these files ({', '.join(CUES)})")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in CUES]
+    if unknown:
+        parser.error(f"unknown cue file(s): {', '.join(unknown)}")
+
+    for name, status in generate_all(args.out, args.names or None, args.force).items():
+        print(f"{status:>9}  {name}")
+    print(f"Synthesis: {'numpy' if np is not None else 'array'}")
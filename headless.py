@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+from timer_engine import TimerSettings, CUE_WARNING, CUE_LOOP, MODE_CIRCLEC
+from timer_scheduler import TimerScheduler
+from cue_audio import CueMixer, NullSink, load_cue_sounds
+from settings_store import read_settings_file, normalize_settings
+from hotkeys import hotkey_service
+
+# Terminal mode for low-spec machines: `main.py --headless`.
+# Same settings.json, presets, phase programs, CircleC and hotkeys as the
+# window, driven by the same CountdownEngine, but no QtWidgets: the engine
+# runs on a TimerScheduler and the loop sleeps until its next due cue, a
+# command or the next display refresh.
+# Sounds go through the same CueMixer; the output is the Qt audio sink on a
+# bare QCoreApplication, or NullSink with RUBE_TIMER_AUDIO=null.
+
+# Terminal refresh while running (the window repaints at the display rate)
+DISPLAY_HZ = 4
+# Name of the countdown on the scheduler
+TIMER = "main"
+
+
+class HeadlessTimer:
+
+    def __init__(self, base_dir, audio_backend="qt"):
+        data = normalize_settings(read_settings_file(os.path.join(base_dir, "settings.json")) or {})
+        self.settings = TimerSettings.from_dict(data)
+        self.data = data
+        self.scheduler = TimerScheduler()
+        self.engine = self.scheduler.add(TIMER, self.settings, 2 if len(self.settings.presets) >= 3 else 0)
+        self.scheduler.add_listener(lambda name, event: self.handle_cue(event))
+        self.mixer = CueMixer()
+        self.mixer.set_premix(data["premixed_cues"])
+        load_cue_sounds(self.mixer, base_dir, data["audio"])
+        self.output = self._open_output(audio_backend)
+        device = getattr(self.output, "device_name", None)
+        self.mixer.set_device_latency_ms(float(data["audio_latency_ms"].get(device, 0.0)))
+        self.hotkeys = hotkey_service()
+        self.instance_listener = None
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._interactive = sys.stdout.isatty()
+        self._last_line = None
+
+    def _open_output(self, backend):
+        if backend != "null":
+            try:
+                # QtCore and QtMultimedia only; the sink runs on its own QThread
+                from PyQt6.QtCore import QCoreApplication
+                self._qt_app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+                from audio_output import CueOutput
+                return CueOutput(self.mixer)
+            except Exception as e:
+                print(f"Failed to open audio output, running silent: {e}")
+        sink = NullSink(self.mixer)
+        sink.start()
+        return sink
+
+    # --- Input (any thread) ---
+
+    def command(self, action, value=None):
+        self._commands.put((action, value))
+        self._wake.set()
+
+    def bind_hotkeys(self):
+        data = self.data
+        bindings = {}
+        if data["circlec_hotkey_enabled"] and data["circlec_hotkey"]:
+            bindings[data["circlec_hotkey"]] = lambda key, pressed_ns: self.command("circlec", pressed_ns)
+        # START wins if both actions share a key
+        if data["start_hotkey_enabled"] and data["start_hotkey"]:
+            bindings[data["start_hotkey"]] = lambda key, pressed_ns: self.command("start", pressed_ns)
+        self.hotkeys.set_bindings(bindings)
+        self.hotkeys.start()
+
+    def listen_for_instances(self, sock):
+        from single_instance import InstanceListener
+        self.instance_listener = InstanceListener(sock, self.command)
+        self.instance_listener.start()
+
+    # --- Loop (main thread) ---
+
+    def run(self, duration=None):
+        # Until Ctrl+C, or for `duration` seconds (benchmarks)
+        engine = self.engine
+        scheduler = self.scheduler
+        end_ns = None if duration is None else time.monotonic_ns() + int(duration * 1e9)
+        interval_ns = 1_000_000_000 // DISPLAY_HZ
+        next_draw_ns = 0
+        self.draw()
+        try:
+            while True:
+                self._wake.clear()
+                while not self._commands.empty():
+                    self.handle_command(*self._commands.get())
+                scheduler.run_due()
+                now_ns = time.monotonic_ns()
+                if end_ns is not None and now_ns >= end_ns:
+                    break
+                if engine.running and now_ns >= next_draw_ns:
+                    self.draw()
+                    next_draw_ns = now_ns + interval_ns
+                # Idle: only commands wake the loop early (the cap keeps Ctrl+C responsive)
+                wake_ns = next_draw_ns if engine.running else now_ns + interval_ns
+                due_ns = scheduler.next_wake_ns()
+                if due_ns is not None:
+                    wake_ns = min(wake_ns, due_ns)
+                if end_ns is not None:
+                    wake_ns = min(wake_ns, end_ns)
+                self._wake.wait(max(0, wake_ns - time.monotonic_ns()) / 1e9)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._interactive:
+                sys.stdout.write("\n")
+
+    def close(self):
+        self.hotkeys.stop()
+        if self.instance_listener is not None:
+            self.instance_listener.stop()
+        self.output.stop()
+
+    def handle_command(self, action, value):
+        engine = self.engine
+        scheduler = self.scheduler
+        if action == "start":
+            # Hotkey presses carry the press time; starts are backdated to it
+            if scheduler.start(TIMER, None, value):
+                self.mixer.schedule(engine.upcoming_cues())
+        elif action == "circlec":
+            if scheduler.start(TIMER, MODE_CIRCLEC, value):
+                self.mixer.schedule(engine.upcoming_cues())
+        elif action == "stop":
+            scheduler.stop(TIMER)
+            self.mixer.clear_schedule()
+        elif action == "preset":
+            if 0 <= value < len(self.settings.presets):
+                engine.select_preset(value)
+        elif action == "nudge":
+            scheduler.nudge(TIMER, value)
+            self.mixer.schedule(engine.upcoming_cues())
+        self.draw()
+
+    def handle_cue(self, event):
+        # Sounds are already scheduled in the mixer; only the next loop's are added
+        if event.kind == CUE_LOOP:
+            self.mixer.schedule(self.engine.upcoming_cues())
+        if event.kind in (CUE_WARNING, CUE_LOOP):
+            self.draw()
+
+    def draw(self):
+        engine = self.engine
+        preset = self.settings.presets[engine.preset_index]
+        mode = "CircleC" if engine.mode == MODE_CIRCLEC else "START" if engine.running else "stopped"
+        line = "{:05.2f}  loop {:<3} {:<7} {:<6} preset {}".format(
+            engine.time_left(), engine.loop_count, mode, engine.warning.upper() if engine.warning != "none" else "",
+            preset.get('label', engine.preset_index + 1))
+        if self._interactive:
+            sys.stdout.write("\r" + line)
+            sys.stdout.flush()
+        elif line[5:] != self._last_line:
+            # Piped output: one line per state change, not per refresh
+            print(line)
+        self._last_line = line[5:]
+
+
+def main(base_dir, commands=(), instance_socket=None):
+    timer = HeadlessTimer(base_dir, os.environ.get("RUBE_TIMER_AUDIO", "qt"))
+    timer.bind_hotkeys()
+    if instance_socket is not None:
+        timer.listen_for_instances(instance_socket)
+    for action, value in commands:
+        timer.command(action, value)
+    print("Headless timer: hotkeys {} START, {} CircleC; Ctrl+C quits".format(
+        timer.data["start_hotkey"].upper(), timer.data["circlec_hotkey"].upper()))
+    timer.run()
+    timer.close()
+    return 0
@@ -0,0 +1,92 @@
+import time
+import threading
+
+
+def key_to_name(key):
+    # pynput Key/KeyCode -> the lowercase names stored in settings.json ("f9", "a")
+    if key is None:
+        return ""
+    try:
+        name = key.char
+    except AttributeError:
+        name = key.name
+    return str(name).lower()
+
+
+class HotkeyService:
+    # The process-wide global keyboard hook. The OS listener is started once;
+    # rebinding swaps a dict and key capture borrows the next press, so the
+    # hook never restarts and no press falls into a restart gap.
+
+    def __init__(self):
+        self._listener = None
+        self._bindings = {}  # key name -> callback(key name, pressed monotonic ns)
+        self._capture = None
+        self._paused = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._listener is not None:
+            return
+        try:
+            # Imported here: pynput and its OS hook cost noticeable startup time
+            from pynput import keyboard
+            self._listener = keyboard.Listener(on_press=self._on_press)
+            self._listener.start()
+        except Exception as e:
+            self._listener = None
+            print(f"Failed to catch keys: {e}")
+
+    def stop(self):
+        if self._listener is not None:
+            try:
+                self._listener.stop()
+            except Exception:
+                pass
+            self._listener = None
+
+    def set_bindings(self, bindings):
+        # Replaces the whole table in one assignment; the hook thread only reads it
+        self._bindings = dict(bindings)
+
+    def pause(self):
+        # Used while settings dialogs are open: presses are ignored, hook stays up
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    def capture(self, callback):
+        # The next key press goes to callback(key name) instead of the bindings
+        with self._lock:
+            self._capture = callback
+
+    def cancel_capture(self, callback):
+        with self._lock:
+            if self._capture == callback:
+                self._capture = None
+
+    def _on_press(self, key):
+        # Stamp the press before anything else; the GUI backdates by the queue delay
+        pressed_ns = time.monotonic_ns()
+        name = key_to_name(key)
+        with self._lock:
+            capture, self._capture = self._capture, None
+        if capture is not None:
+            capture(name)
+            return
+        if self._paused:
+            return
+        action = self._bindings.get(name)
+        if action is not None:
+            action(name, pressed_ns)
+
+
+_service = None
+
+
+def hotkey_service():
+    global _service
+    if _service is None:
+        _service = HotkeyService()
+    return _service
@@ -0,0 +1,92 @@
+import time
+from array import array
+
+# Output latency calibration: play a few clicks at known times through the
+# cue mixer, record them back through a loopback capture and take the median
+# delay between when a click was due and when it was heard. The result is the
+# latency of the device behind the output buffer; CueMixer renders scheduled
+# cues that much earlier (CueMixer.set_device_latency_ms).
+#
+# A capture is anything with start_capture() / stop_capture() returning
+# [(monotonic ns of the chunk's first sample, array('h') samples)]:
+# audio_output.LoopbackCapture for a real device, NullSink offline.
+
+CLICK_KEY = "_calibration_click"
+CLICK_MS = 5
+CLICK_COUNT = 5
+CLICK_SPACING_MS = 400
+LEAD_MS = 300  # silence before the first click, so the stream is settled
+TAIL_MS = 400  # keep capturing after the last click for late devices
+ONSET_THRESHOLD = 6000  # |sample| that counts as the click arriving
+
+
+def make_click(rate, ms=CLICK_MS):
+    # Short full-scale square burst (about 1.1 kHz): easy to find above noise
+    half_period = max(1, rate // 2200)
+    return array('h', (24000 if (i // half_period) % 2 == 0 else -24000 for i in range(rate * ms // 1000)))
+
+
+def find_onsets(chunks, click_ns, rate, threshold=ONSET_THRESHOLD, window_ns=CLICK_SPACING_MS * 1_000_000):
+    # Heard time of the first loud sample after each click was due, or None
+    onsets = [None] * len(click_ns)
+    for chunk_ns, samples in chunks:
+        for i, value in enumerate(samples):
+            if value < threshold and value > -threshold:
+                continue
+            heard_ns = chunk_ns + i * 1_000_000_000 // rate
+            for k, due_ns in enumerate(click_ns):
+                if onsets[k] is None and due_ns <= heard_ns < due_ns + window_ns:
+                    onsets[k] = heard_ns
+                    break
+    return onsets
+
+
+def median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+class LatencyCalibration:
+    # begin() schedules the clicks and returns how long to wait (ms);
+    # finish() stops the capture and returns the measured latency in ms, or
+    # None when too few clicks came back (no loopback, muted output, ...).
+    # Non-blocking, so the GUI can run it from a single-shot timer.
+
+    def __init__(self, mixer, capture, clicks=CLICK_COUNT, spacing_ms=CLICK_SPACING_MS,
+                 keep_offset=False, clock=time.monotonic_ns):
+        self.mixer = mixer
+        self.capture = capture
+        self.clicks = clicks
+        self.spacing_ms = spacing_ms
+        # False measures the raw device; True measures what is left with the
+        # current offset applied (should be close to 0)
+        self.keep_offset = keep_offset
+        self.clock = clock
+        self.click_ns = []
+        self.latencies_ms = []
+        self._saved_offset_ns = 0
+
+    def begin(self):
+        mixer = self.mixer
+        self._saved_offset_ns = mixer.device_latency_ns
+        if not self.keep_offset:
+            mixer.device_latency_ns = 0
+        mixer.add_buffer(CLICK_KEY, make_click(mixer.rate))
+        self.capture.start_capture()
+        first_ns = self.clock() + LEAD_MS * 1_000_000
+        self.click_ns = [first_ns + i * self.spacing_ms * 1_000_000 for i in range(self.clicks)]
+        mixer.schedule([(at_ns, CLICK_KEY) for at_ns in self.click_ns])
+        return LEAD_MS + self.clicks * self.spacing_ms + TAIL_MS
+
+    def finish(self):
+        chunks = self.capture.stop_capture()
+        mixer = self.mixer
+        mixer.clear_schedule()
+        mixer.remove_buffer(CLICK_KEY)
+        mixer.device_latency_ns = self._saved_offset_ns
+        onsets = find_onsets(chunks, self.click_ns, mixer.rate, window_ns=self.spacing_ms * 1_000_000)
+        self.latencies_ms = [(onset - due) / 1e6 for due, onset in zip(self.click_ns, onsets) if onset is not None]
+        if len(self.latencies_ms) * 2 <= self.clicks:
+            return None
+        return median(self.latencies_ms)
@@ -1,7 +1,21 @@
+import time
+# Startup timing: everything below is measured from here
+STARTUP_T0 = time.perf_counter()
+
 import sys
-import json
+import copy
+import math
 import os
-from pynput import keyboard
+import threading
+
+# Set RUBE_TIMER_DEBUG=1 to print render statistics and other diagnostics
+DEBUG = bool(os.environ.get("RUBE_TIMER_DEBUG"))
+# RUBE_TIMER_AUDIO=null renders cues into a discarding sink (benchmarks, CI)
+AUDIO_BACKEND = os.environ.get("RUBE_TIMER_AUDIO", "qt")
+# RUBE_TIMER_LOG=0 turns off the binary session log in logs/
+SESSION_LOG = os.environ.get("RUBE_TIMER_LOG", "1") != "0"
+# RUBE_TIMER_SHARED_STATE=0 stops publishing the state file for overlays
+SHARED_STATE = os.environ.get("RUBE_TIMER_SHARED_STATE", "1") != "0"
 
 def get_bundle_dir():
     return getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
@@ -11,14 +25,56 @@ def get_external_dir():
         return os.path.dirname(sys.executable)
     return os.path.dirname(os.path.abspath(__file__))
 
+if __name__ == '__main__':
+    # One copy per machine: a second launch forwards its command line
+    # (--start, --circlec, --stop, --preset N) to the running copy and exits
+    # here, before Qt is imported
+    import single_instance
+    HEADLESS = "--headless" in sys.argv[1:]
+    try:
+        LAUNCH_COMMANDS = single_instance.parse_args([a for a in sys.argv[1:] if a != "--headless"])
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+    INSTANCE_SOCKET = single_instance.claim()
+    if INSTANCE_SOCKET is None:
+        if single_instance.forward(LAUNCH_COMMANDS):
+            sys.exit(0)
+        # Port held by something else: run without the guard
+        print("Could not reach the running instance; starting anyway")
+    if HEADLESS:
+        # Terminal mode: no QtWidgets (headless.py)
+        import headless
+        sys.exit(headless.main(get_external_dir(), LAUNCH_COMMANDS, INSTANCE_SOCKET))
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QPushButton, QLabel, QSlider, QProgressBar, 
-                             QFrame, QSpacerItem, QSizePolicy, QDialog, QFormLayout, QGridLayout, 
+                             QHBoxLayout, QPushButton, QLabel, QSlider, 
+                             QSpacerItem, QSizePolicy, QDialog, QFormLayout, QGridLayout, 
                              QLineEdit, QDoubleSpinBox, QDialogButtonBox, QMessageBox, QCheckBox,
                              QTabWidget, QGroupBox, QMenu, QComboBox)
-from PyQt6.QtCore import Qt, QTimer, QUrl, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QFileSystemWatcher
 from PyQt6.QtGui import QFont, QFontDatabase, QIcon, QCursor, QAction
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+from timer_engine import (CountdownEngine, CUE_WARNING, CUE_LOOP, MODE_NORMAL, MODE_CIRCLEC, seconds_to_ns,
+                          timed_phases)
+from cue_audio import CueMixer, NullSink, load_cue_sounds
+from frame_pacing import DirtyTracker, frame_interval_ms
+from display_widget import CountdownDisplay
+from hotkeys import hotkey_service
+from session_log import (SessionLog, NullSessionLog, sound_code, EV_START, EV_CIRCLEC, EV_STOP,
+                         EV_LOOP, EV_CUE, EV_NUDGE, EV_HOTKEY, EV_PRESET)
+from latency_calibration import LatencyCalibration
+from shared_state import StateWriter
+from settings_store import (SettingsWriter, read_settings_file, normalize_settings, diff_settings,
+                            migrate_label3_phases, DEFAULT_AUDIO_SETTINGS)
+
+IMPORT_DONE = time.perf_counter()
+
+# settings.json field -> window attribute, where the names differ
+SETTINGS_ATTRS = {"audio": "audio_settings"}
+
+# Quiet time after a settings.json change before it is re-read
+RELOAD_DEBOUNCE_MS = 200
 
 TRANSLATIONS = {
     "en": {
@@ -54,6 +110,7 @@ TRANSLATIONS = {
         "start_rainbow": "Loop Time (Rainbow):",
         "circlec_slow": "Slow Floor:",
         "circlec_fast": "Fast Floor:",
+        "phase_n": "Phase {} (s):",
         "circled_ab": "Label 3 CircleD (A/B):",
         "start_ab": "Label 3 START (A/B):",
         "ok": "OK",
@@ -92,6 +149,7 @@ TRANSLATIONS = {
         "start_rainbow": "ループ時間(虹):",
         "circlec_slow": "遅い床(秒):",
         "circlec_fast": "早い床(秒):",
+        "phase_n": "フェーズ{}(秒):",
         "first_time_input": "初回設定時間(秒):",
         "loop_time_input": "ループ時間(秒):",
         "circled_ab": "ラベル3 サークルD A/B:",
@@ -101,16 +159,29 @@ TRANSLATIONS = {
     }
 }
 
+
+def phase_label(tr, spec, number):
+    # Row label for a timed phase: its name (a translation key or plain text)
+    return tr(spec['name']) if spec.get('name') else tr("phase_n").format(number)
+
+
+def phase_times_text(phases):
+    # "23.75/23.50" for the buttons of presets with a phase program
+    return "/".join(f"{float(spec['time']):.2f}" for spec in phases)
+
+
 class KeyCaptureButton(QPushButton):
     keyChanged = pyqtSignal(str)
+    # Delivered from the hook thread, handled on the GUI thread
+    keyCaptured = pyqtSignal(str)
 
     def __init__(self, current_key, parent_dialog=None):
         super().__init__(str(current_key).upper())
         self.parent_dialog = parent_dialog
         self.key_name = str(current_key).lower()
-        self.listener = None
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         self.clicked.connect(self.start_capture)
+        self.keyCaptured.connect(self.finish_capture)
         
         # Style will be handled by parent dialog or globally
         self.setProperty("active", "false")
@@ -126,36 +197,32 @@ class KeyCaptureButton(QPushButton):
         self.style().unpolish(self)
         self.style().polish(self)
         
-        if self.listener is not None:
-            self.listener.stop()
-            
-        self.listener = keyboard.Listener(on_press=self.on_press)
-        self.listener.start()
-        
-    def on_press(self, key):
-        try:
-            key_name = key.char
-        except AttributeError:
-            key_name = key.name
-            
-        self.key_name = str(key_name).lower()
-        QTimer.singleShot(0, self.finish_capture)
-        return False # Stop listener
+        # Borrow the next press from the shared global hook
+        hotkey_service().capture(self.on_hook_key)
+
+    def on_hook_key(self, key_name):
+        self.keyCaptured.emit(key_name)
         
-    def finish_capture(self):
+    def finish_capture(self, key_name):
+        self.key_name = key_name
         self.setText(self.key_name.upper())
         self.setProperty("active", "false")
         self.style().unpolish(self)
         self.style().polish(self)
-        if self.listener is not None:
-            self.listener.stop()
-            self.listener = None
         self.keyChanged.emit(self.key_name)
 
+    def set_key(self, key_name):
+        # Reset to a stored key without emitting keyChanged (dialog reuse)
+        self.stop_listener()
+        self.key_name = str(key_name).lower()
+        self.setText(self.key_name.upper())
+        if self.property("active") != "false":
+            self.setProperty("active", "false")
+            self.style().unpolish(self)
+            self.style().polish(self)
+
     def stop_listener(self):
-        if self.listener is not None:
-            self.listener.stop()
-            self.listener = None
+        hotkey_service().cancel_capture(self.on_hook_key)
 
 class PresetEditDialog(QDialog):
     def __init__(self, current_label, current_time, current_first_time, index, parent=None):
@@ -216,24 +283,24 @@ class PresetEditDialog(QDialog):
         self.first_time_edit.setSingleStep(1.0)
         self.first_time_edit.setValue(current_first_time)
         
+        # A preset with a START phase program edits each phase's length
+        # instead of the single loop time
+        phases = timed_phases(self.app_ref.presets[index], MODE_NORMAL) if self.app_ref else []
         layout.addRow(self.tr("label_label"), self.label_edit)
-        if self.preset_index != 2:
+        if not phases:
             layout.addRow(self.tr("loop_time"), self.time_edit)
         layout.addRow(self.tr("first_time"), self.first_time_edit)
         
-        # New: Label 3 phasing in individual edit dialog
-        if self.preset_index == 2:
-            self.setFixedSize(300, 240) # Smaller height since floors are removed
-            
-            self.st_a_edit = QDoubleSpinBox()
-            self.st_a_edit.setDecimals(2)
-            self.st_a_edit.setValue(parent.label3_start_phases[0])
-            self.st_b_edit = QDoubleSpinBox()
-            self.st_b_edit.setDecimals(2)
-            self.st_b_edit.setValue(parent.label3_start_phases[1])
-            
-            layout.addRow(self.tr("start_yellow"), self.st_a_edit)
-            layout.addRow(self.tr("start_rainbow"), self.st_b_edit)
+        self.phase_edits = []
+        if phases:
+            self.setFixedSize(300, 190 + 25 * len(phases))
+            for number, spec in enumerate(phases, 1):
+                edit = QDoubleSpinBox()
+                edit.setDecimals(2)
+                edit.setMaximum(9999.99)
+                edit.setValue(float(spec['time']))
+                layout.addRow(phase_label(self.tr, spec, number), edit)
+                self.phase_edits.append(edit)
         
         btn_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         btn_box.accepted.connect(self.accept)
@@ -378,17 +445,19 @@ class CircleCSettingsDialog(QDialog):
             sb.setValue(val)
             return sb
 
-        if self.app_ref.current_preset_index == 2:
-            # Label 3: Slow/Fast Floor
-            self.p3_cd_a = create_sb(self.app_ref.label3_circled_phases[0])
-            self.p3_cd_b = create_sb(self.app_ref.label3_circled_phases[1])
-            self.circlec_first = create_sb(self.app_ref.circlec_first_time)
-            
-            time_form.addRow(self.tr("circlec_slow"), self.p3_cd_a)
-            time_form.addRow(self.tr("circlec_fast"), self.p3_cd_b)
+        app = self.app_ref
+        self.phase_edits = []
+        phases = timed_phases(app.presets[app.current_preset_index], MODE_CIRCLEC)
+        if phases:
+            # Preset with a CircleC phase program: one length per phase
+            for number, spec in enumerate(phases, 1):
+                edit = create_sb(float(spec['time']))
+                time_form.addRow(phase_label(self.tr, spec, number), edit)
+                self.phase_edits.append(edit)
+            self.cc_first = create_sb(app.circlec_first_time)
             # Add a small spacer
             time_form.addItem(QSpacerItem(20, 10, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed))
-            time_form.addRow(self.tr("first_time_input"), self.circlec_first)
+            time_form.addRow(self.tr("first_time_input"), self.cc_first)
         else:
             # Regular CircleC
             self.cc_loop = create_sb(self.app_ref.circlec_loop_time)
@@ -426,14 +495,13 @@ class CircleCSettingsDialog(QDialog):
     def get_data(self):
         data = {
             "hotkey": self.hk_btn.key_name,
-            "enabled": self.hk_chk.isChecked()
+            "enabled": self.hk_chk.isChecked(),
+            "circlec_first_time": self.cc_first.value()
         }
-        if self.app_ref.current_preset_index == 2:
-            data["label3_circled_phases"] = [self.p3_cd_a.value(), self.p3_cd_b.value()]
-            data["circlec_first_time"] = self.circlec_first.value()
+        if self.phase_edits:
+            data["phases"] = [edit.value() for edit in self.phase_edits]
         else:
             data["circlec_loop_time"] = self.cc_loop.value()
-            data["circlec_first_time"] = self.cc_first.value()
         return data
 
 class GlobalSettingsDialog(QDialog):
@@ -441,34 +509,12 @@ class GlobalSettingsDialog(QDialog):
         super().__init__(parent)
         self.app_ref = parent_app
         self.setWindowTitle("Global Settings")
-        self.setFixedSize(850, 880)
+        # Grows with the rows of longer phase programs
+        self.setFixedWidth(850)
+        self.setMinimumHeight(880)
         
-        self.setStyleSheet("""
-            QDialog { background-color: #22252a; color: white; }
-            QGroupBox { 
-                font-weight: bold; 
-                border: 1px solid #3ca4ff; 
-                border-radius: 5px; 
-                margin-top: 10px;
-                padding-top: 15px; 
-            }
-            QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 5px; color: #3ca4ff; }
-            QLabel { color: white; font-size: 13px; }
-            QLineEdit, QDoubleSpinBox { 
-                background-color: #111317; 
-                color: white; 
-                border: 1px solid #3c4049; 
-                padding: 4px; 
-            }
-            QDoubleSpinBox::up-button, QDoubleSpinBox::down-button { width: 16px; }
-            QPushButton {
-                background-color: #2b2e35;
-                color: white;
-                border: 1px solid #3c4049;
-                padding: 6px 15px;
-            }
-            QPushButton:hover { background-color: #353a42; border-color: #3ca4ff; }
-        """)
+        # Styled by the QDialog#GlobalSettingsDialog rules in style.qss
+        self.setObjectName("GlobalSettingsDialog")
         
         main_layout = QVBoxLayout(self)
         main_layout.setSpacing(25)
@@ -478,6 +524,9 @@ class GlobalSettingsDialog(QDialog):
         preset_vbox = QVBoxLayout(preset_group)
         preset_vbox.setSpacing(25) 
         
+        # Built for the current presets, their phase programs and the language;
+        # the app makes a new dialog if any of them changes (see matches_app)
+        self.built_for = self.layout_key()
         self.preset_inputs = []
         for i, preset in enumerate(self.app_ref.presets):
             preset_block = QWidget()
@@ -505,21 +554,14 @@ class GlobalSettingsDialog(QDialog):
 
             sb_loop = create_sb(float(preset['time']))
             sb_first = create_sb(float(preset.get('first_time', 5.00)))
+            phases = timed_phases(preset, MODE_NORMAL)
+            phase_sbs = [create_sb(float(spec['time'])) for spec in phases]
             
-            if i == 2:
-                # Label 3: START timings (Yellow/Rainbow/First)
-                self.p3_st_a = create_sb(self.app_ref.label3_start_phases[0])
-                self.p3_st_b = create_sb(self.app_ref.label3_start_phases[1])
-                
-                # Row 1: Yellow Loop and Rainbow Loop
-                block_grid.addWidget(QLabel(self.tr("start_yellow")), 1, 0, Qt.AlignmentFlag.AlignRight)
-                block_grid.addWidget(self.p3_st_a, 1, 1)
-                block_grid.addWidget(QLabel(self.tr("start_rainbow")), 1, 2, Qt.AlignmentFlag.AlignRight)
-                block_grid.addWidget(self.p3_st_b, 1, 3)
-                
-                # Row 2: First Time
-                block_grid.addWidget(QLabel(self.tr("first_time_input")), 2, 0, Qt.AlignmentFlag.AlignRight)
-                block_grid.addWidget(sb_first, 2, 1)
+            if phases:
+                # START phase program: two phase lengths per row, then First Time
+                row = self.add_phase_rows(block_grid, 1, phases, phase_sbs)
+                block_grid.addWidget(QLabel(self.tr("first_time_input")), row, 0, Qt.AlignmentFlag.AlignRight)
+                block_grid.addWidget(sb_first, row, 1)
             else:
                 # Row 1: Loop Time and First Time
                 block_grid.addWidget(QLabel(self.tr("loop_time_input")), 1, 0, Qt.AlignmentFlag.AlignRight)
@@ -528,7 +570,8 @@ class GlobalSettingsDialog(QDialog):
                 block_grid.addWidget(sb_first, 1, 3)
                 
             preset_vbox.addWidget(preset_block)
-            self.preset_inputs.append({'label': le_label, 'time': sb_loop, 'first_time': sb_first})
+            self.preset_inputs.append({'label': le_label, 'time': sb_loop, 'first_time': sb_first,
+                                       'phases': phase_sbs})
             
         main_layout.addWidget(preset_group)
         
@@ -546,23 +589,24 @@ class GlobalSettingsDialog(QDialog):
         circlec_grid.addWidget(QLabel(self.tr("first_time_input")), 0, 2, Qt.AlignmentFlag.AlignRight)
         circlec_grid.addWidget(self.circlec_first_input, 0, 3)
         
-        # Row 1: Slow and Fast Floor
-        self.p3_cd_a = create_sb(self.app_ref.label3_circled_phases[0])
-        self.p3_cd_b = create_sb(self.app_ref.label3_circled_phases[1])
-        
-        circlec_grid.addWidget(QLabel(self.tr("circlec_slow")), 1, 0, Qt.AlignmentFlag.AlignRight)
-        circlec_grid.addWidget(self.p3_cd_a, 1, 1)
-        circlec_grid.addWidget(QLabel(self.tr("circlec_fast")), 1, 2, Qt.AlignmentFlag.AlignRight)
-        circlec_grid.addWidget(self.p3_cd_b, 1, 3)
+        # Next rows: phase lengths of each preset with a CircleC phase program
+        row = 1
+        self.circlec_phase_inputs = []  # (preset index, spin boxes)
+        for i, preset in enumerate(self.app_ref.presets):
+            phases = timed_phases(preset, MODE_CIRCLEC)
+            if phases:
+                phase_sbs = [create_sb(float(spec['time'])) for spec in phases]
+                row = self.add_phase_rows(circlec_grid, row, phases, phase_sbs)
+                self.circlec_phase_inputs.append((i, phase_sbs))
         
-        # Row 2: Hotkey
+        # Last row: Hotkey
         self.circlec_hotkey_btn = KeyCaptureButton(self.app_ref.circlec_hotkey, parent_dialog=self)
         self.enable_circlec_hk_chk = QCheckBox(self.tr("enable_circlec"))
         self.enable_circlec_hk_chk.setChecked(self.app_ref.circlec_hotkey_enabled)
         
-        circlec_grid.addWidget(QLabel(self.tr("hotkey")), 2, 0, Qt.AlignmentFlag.AlignRight)
-        circlec_grid.addWidget(self.circlec_hotkey_btn, 2, 1)
-        circlec_grid.addWidget(self.enable_circlec_hk_chk, 2, 2, 1, 2)
+        circlec_grid.addWidget(QLabel(self.tr("hotkey")), row, 0, Qt.AlignmentFlag.AlignRight)
+        circlec_grid.addWidget(self.circlec_hotkey_btn, row, 1)
+        circlec_grid.addWidget(self.enable_circlec_hk_chk, row, 2, 1, 2)
 
         main_layout.addWidget(circlec_group)
         
@@ -609,15 +653,71 @@ class GlobalSettingsDialog(QDialog):
     def tr(self, key):
         return TRANSLATIONS.get(self.app_ref.language, TRANSLATIONS["en"]).get(key, key)
 
+    def layout_key(self):
+        app = self.app_ref
+        programs = tuple((len(timed_phases(preset, MODE_NORMAL)), len(timed_phases(preset, MODE_CIRCLEC)))
+                         for preset in app.presets)
+        return (len(app.presets), programs, app.language)
+
+    def matches_app(self):
+        return self.built_for == self.layout_key()
+
+    def add_phase_rows(self, grid, row, phases, spin_boxes):
+        # Two "label spin box" pairs per row from `row`; returns the next free row
+        for n, (spec, sb) in enumerate(zip(phases, spin_boxes)):
+            col = (n % 2) * 2
+            grid.addWidget(QLabel(phase_label(self.tr, spec, n + 1)), row + n // 2, col, Qt.AlignmentFlag.AlignRight)
+            grid.addWidget(sb, row + n // 2, col + 1)
+        return row + (len(phases) + 1) // 2
+
+    def refresh(self):
+        # Loads the app's current values into the existing widgets before exec()
+        app = self.app_ref
+        for inputs, preset in zip(self.preset_inputs, app.presets):
+            inputs['label'].setText(preset['label'])
+            inputs['time'].setValue(float(preset['time']))
+            inputs['first_time'].setValue(float(preset.get('first_time', 5.00)))
+            for sb, spec in zip(inputs['phases'], timed_phases(preset, MODE_NORMAL)):
+                sb.setValue(float(spec['time']))
+        self.circlec_loop_input.setValue(app.circlec_loop_time)
+        self.circlec_first_input.setValue(app.circlec_first_time)
+        for i, phase_sbs in self.circlec_phase_inputs:
+            for sb, spec in zip(phase_sbs, timed_phases(app.presets[i], MODE_CIRCLEC)):
+                sb.setValue(float(spec['time']))
+        self.circlec_hotkey_btn.set_key(app.circlec_hotkey)
+        self.enable_circlec_hk_chk.setChecked(app.circlec_hotkey_enabled)
+        self.start_hotkey_btn.set_key(app.start_hotkey)
+        self.enable_start_hk_chk.setChecked(app.start_hotkey_enabled)
+        index = self.lang_combo.findData(app.language)
+        if index >= 0:
+            self.lang_combo.setCurrentIndex(index)
+
     def get_data(self):
+        # {"values": every setting as edited, "changes": diff_settings() against
+        # the app}; the app applies only what is listed in "changes"
+        values = self.app_ref.settings_data()
+        values.update(self.edited_values())
+        return {"values": values, "changes": diff_settings(self.app_ref.settings_data(), values)}
+
+    def edited_values(self):
         presets_data = []
-        for inputs in self.preset_inputs:
-            presets_data.append({
+        for inputs, preset in zip(self.preset_inputs, self.app_ref.presets):
+            # Keep any extra keys the preset carries in settings.json
+            edited = dict(preset)
+            edited.update({
                 'label': inputs['label'].text(),
                 'time': inputs['time'].value(),
                 'first_time': inputs['first_time'].value()
             })
-            
+            if 'phases' in preset:
+                # A copy: the app's programs only change once the result is applied
+                edited['phases'] = copy.deepcopy(preset['phases'])
+                for sb, spec in zip(inputs['phases'], timed_phases(edited, MODE_NORMAL)):
+                    spec['time'] = sb.value()
+            presets_data.append(edited)
+        for i, phase_sbs in self.circlec_phase_inputs:
+            for sb, spec in zip(phase_sbs, timed_phases(presets_data[i], MODE_CIRCLEC)):
+                spec['time'] = sb.value()
         return {
             'presets': presets_data,
             'language': self.lang_combo.currentData(),
@@ -626,9 +726,7 @@ class GlobalSettingsDialog(QDialog):
             'circlec_hotkey': self.circlec_hotkey_btn.key_name,
             'circlec_hotkey_enabled': self.enable_circlec_hk_chk.isChecked(),
             'start_hotkey': self.start_hotkey_btn.key_name,
-            'start_hotkey_enabled': self.enable_start_hk_chk.isChecked(),
-            'label3_circled_phases': [self.p3_cd_a.value(), self.p3_cd_b.value()],
-            'label3_start_phases': [self.p3_st_a.value(), self.p3_st_b.value()]
+            'start_hotkey_enabled': self.enable_start_hk_chk.isChecked()
         }
 
     def closeEvent(self, event):
@@ -637,7 +735,12 @@ class GlobalSettingsDialog(QDialog):
         super().closeEvent(event)
 
 class CountdownTimerApp(QMainWindow):
-    hotkey_pressed = pyqtSignal(str)
+    # (action, monotonic ns of the key press at the OS hook)
+    hotkey_pressed = pyqtSignal(str, object)
+    # Emitted by the startup loader thread once sounds are decoded
+    audio_loaded = pyqtSignal()
+    # (action, value) from the local control server thread
+    control_command = pyqtSignal(str, object)
     
     def __init__(self):
         super().__init__()
@@ -667,81 +770,85 @@ class CountdownTimerApp(QMainWindow):
         self.start_hotkey_enabled = True
         self.circlec_hotkey_enabled = True
         self.language = "ja"
+        # Label 3 alternates two loop times in both modes
+        migrate_label3_phases(self.presets, {})
         
         # Audio Defaults
-        self.audio_settings = {
-            "warning_5s_red": "sounds/warning_5s_red.wav",
-            "warning_5s_yellow": "sounds/warning_5s_yellow.wav",
-            "warning_5s_circlec": "sounds/warning_5s_circleC.wav",
-            "warning_5s_slow": "sounds/warning_5s_slow.wav",
-            "warning_5s_fast": "sounds/warning_5s_fast.wav",
-            "warning_5s_rainbow": "sounds/warning_5s_rainbow.wav",
-            "count_321": "sounds/count.wav",
-            "end_0s": "sounds/end.wav"
-        }
-        
-        # State variables
-        self.timer_mode = "normal" # "normal" or "circlec"
-        self.current_preset_index = 0
-        self.time_left = 0.0
-        self.initial_time = 0.0
-        self.is_running = False
-        
-        self.loop_count = 1  # 1st: Red, 2nd: Red, 3rd: Yellow -> loop back to 1
-        
-        self.warning_triggered = False
-        self.count_3_triggered = False
-        self.count_2_triggered = False
-        self.count_1_triggered = False
+        self.audio_settings = dict(DEFAULT_AUDIO_SETTINGS)
+        self.audio_latency_ms = {}  # output device name -> calibrated latency
+        self.premixed_cues = False  # play each loop's 5 s tail as one pre-mixed track
+        self.control_port = 0  # localhost control/telemetry API (control_server.py), 0 = off
+        
+        # Countdown state and cue logic live in the Qt-free engine; this window
+        # reads its settings attributes directly and renders its state.
+        self.engine = CountdownEngine(self)
         self._slider_start_val = 0.0
         
+        # Every start/stop, loop, cue, nudge and hotkey press goes to a ring
+        # buffer that a background thread appends to logs/session-*.rlog
+        if SESSION_LOG:
+            log_name = time.strftime("session-%Y%m%d-%H%M%S.rlog")
+            self.session_log = SessionLog(os.path.join(get_external_dir(), "logs", log_name))
+        else:
+            self.session_log = NullSessionLog()
+        
+        # One tick per display refresh: the deadline keeps time, the tick only
+        # has to refresh visuals, and update_display skips unchanged frames.
+        self.render_tracker = DirtyTracker()
         self.timer = QTimer()
-        self.timer.setInterval(10) # 10ms for 0.01s precision
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(10)
         self.timer.timeout.connect(self.update_timer)
         
         self.load_settings()
+        # Saves are debounced and written atomically on a worker thread
+        self.settings_writer = SettingsWriter(self.settings_path())
+        
+        # Hot reload: settings.json edited outside the app is re-read and only
+        # the changed fields are applied. The folder is watched as well because
+        # atomic saves replace the file, which drops it from the file watch.
+        self.settings_watcher = QFileSystemWatcher([get_external_dir()])
+        if os.path.exists(self.settings_path()):
+            self.settings_watcher.addPath(self.settings_path())
+        self.reload_timer = QTimer()
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DEBOUNCE_MS)
+        self.reload_timer.timeout.connect(self.reload_settings)
+        self.settings_watcher.fileChanged.connect(lambda path: self.reload_timer.start())
+        self.settings_watcher.directoryChanged.connect(lambda path: self.reload_timer.start())
         
         # Setup hotkey signal slot
         self.hotkey_pressed.connect(self.handle_hotkey_trigger, Qt.ConnectionType.QueuedConnection)
+        self.control_command.connect(self.handle_control_command, Qt.ConnectionType.QueuedConnection)
+        self.control_server = None
+        self.instance_listener = None
+        self._published_state = None
+        # Memory-mapped state for overlays in other processes (shared_state.py)
+        self.state_writer = None
+        if SHARED_STATE:
+            try:
+                self.state_writer = StateWriter()
+            except (OSError, ValueError) as e:
+                print(f"Failed to open shared state file: {e}")
         
-        self.keyboard_listener = None
+        # One global hook for the whole process; register_hotkey only rebinds it.
+        # The hook itself is started after the first paint (finish_startup).
+        self.hotkeys = hotkey_service()
         self.register_hotkey()
         
-        # Audio Setup
-        self.player_5s_red = QMediaPlayer()
-        self.audio_out_5s_red = QAudioOutput()
-        self.player_5s_red.setAudioOutput(self.audio_out_5s_red)
-        
-        self.player_5s_yellow = QMediaPlayer()
-        self.audio_out_5s_yellow = QAudioOutput()
-        self.player_5s_yellow.setAudioOutput(self.audio_out_5s_yellow)
-        
-        self.player_5s_circlec = QMediaPlayer()
-        self.audio_out_5s_circlec = QAudioOutput()
-        self.player_5s_circlec.setAudioOutput(self.audio_out_5s_circlec)
-        
-        self.player_5s_slow = QMediaPlayer()
-        self.audio_out_5s_slow = QAudioOutput()
-        self.player_5s_slow.setAudioOutput(self.audio_out_5s_slow)
-        
-        self.player_5s_fast = QMediaPlayer()
-        self.audio_out_5s_fast = QAudioOutput()
-        self.player_5s_fast.setAudioOutput(self.audio_out_5s_fast)
-        
-        self.player_5s_rainbow = QMediaPlayer()
-        self.audio_out_5s_rainbow = QAudioOutput()
-        self.player_5s_rainbow.setAudioOutput(self.audio_out_5s_rainbow)
-        
-        self.player_count = QMediaPlayer()
-        self.audio_out_count = QAudioOutput()
-        self.player_count.setAudioOutput(self.audio_out_count)
-        
-        self.player_end = QMediaPlayer()
-        self.audio_out_end = QAudioOutput()
-        self.player_end.setAudioOutput(self.audio_out_end)
+        # Audio Setup: every cue is decoded once and mixed into one open output stream.
+        # The mixer exists from the start so cues are queued until it can play them;
+        # decoding and the output device come up after the first paint.
+        self.mixer = CueMixer()
+        self.mixer.set_premix(self.premixed_cues)
+        self.audio_output = None
+        self.audio_loaded.connect(self.open_audio_output, Qt.ConnectionType.QueuedConnection)
+        self.calibration = None
+        self.settings_dialog = None
+        self.startup_times = {"import_ms": (IMPORT_DONE - STARTUP_T0) * 1000}
+        self._startup_done = False
         
         self.init_ui()
-        self.load_audio_files()
         
         # Select Preset 3 by default if it exists (index 2)
         if len(self.presets) >= 3:
@@ -752,110 +859,63 @@ class CountdownTimerApp(QMainWindow):
         # Set initial volume
         self.update_volume(self.vol_slider.value())
 
+    # Read-only views of the engine state
+    @property
+    def is_running(self):
+        return self.engine.running
+
+    @property
+    def timer_mode(self):
+        return self.engine.mode
+
+    @property
+    def current_preset_index(self):
+        return self.engine.preset_index
+
+    @property
+    def loop_count(self):
+        return self.engine.loop_count
+
+    @property
+    def time_left(self):
+        return self.engine.time_left()
+
+    def settings_path(self):
+        return os.path.join(get_external_dir(), 'settings.json')
+
     def load_settings(self):
-        settings_path = os.path.join(get_external_dir(), 'settings.json')
-        if not os.path.exists(settings_path):
+        data = read_settings_file(self.settings_path())
+        if data is None:
             return
-            
         try:
-            # Try loading as UTF-8 first
-            with open(settings_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except UnicodeDecodeError:
-            try:
-                # Fallback to CP932 (Japanese Windows default) if UTF-8 fails
-                with open(settings_path, 'r', encoding='cp932') as f:
-                    data = json.load(f)
-            except Exception:
-                print("Failed to decode settings.json with UTF-8 or CP932")
-                return
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"settings.json missing or invalid! {e}")
-            return
-        except Exception as e:
-            print(f"Unexpected error loading settings: {e}")
-            return
-
-        try:
-            self.presets = data.get('presets', [])
-            
-            # Upgrade presets to have 'first_time' if missing, or enforce 5.00 if user requests 
-            for p in self.presets:
-                # To satisfy user request, we enforce 5.00 if it was the old default of 6.00
-                if 'first_time' not in p or p['first_time'] == 6.00:
-                    p['first_time'] = 5.00
-                    
-            self.audio_settings = data.get('audio', {})
-            self.start_hotkey = data.get('start_hotkey', 'f9')
-            # Handle migration from disaster_hotkey/circled_hotkey to circlec_hotkey
-            self.circlec_hotkey = data.get('circlec_hotkey', data.get('disaster_hotkey', data.get('circled_hotkey', 'f8')))
-            
-            self.circlec_loop_time = float(data.get('circlec_loop_time', data.get('circled_loop_time', 19.15)))
-            self.circlec_first_time = float(data.get('circlec_first_time', data.get('circled_first_time', 5.00)))
-            
-            # Individual hotkey flags
-            self.start_hotkey_enabled = data.get('start_hotkey_enabled', data.get('hotkey_enabled', True))
-            self.circlec_hotkey_enabled = data.get('circlec_hotkey_enabled', data.get('circled_hotkey_enabled', data.get('hotkey_enabled', True)))
-            self.language = data.get('language', 'en')
-            
-            # Label 3 Multi-phase settings
-            p3 = self.presets[2] if len(self.presets) > 2 else {}
-            self.label3_circled_phases = data.get('label3_circled_phases', [23.50, 21.00]) # Updated v1.6.9
-            self.label3_start_phases = data.get('label3_start_phases', [23.75, 23.50]) # New defaults
+            for field, value in normalize_settings(data).items():
+                setattr(self, SETTINGS_ATTRS.get(field, field), value)
         except Exception as e:
             print(f"Error parsing loaded settings: {e}")
 
+    def settings_data(self):
+        return {
+            "start_hotkey": self.start_hotkey,
+            "circlec_hotkey": self.circlec_hotkey,
+            "circlec_loop_time": self.circlec_loop_time,
+            "circlec_first_time": self.circlec_first_time,
+            "start_hotkey_enabled": self.start_hotkey_enabled,
+            "circlec_hotkey_enabled": self.circlec_hotkey_enabled,
+            "language": self.language,
+            "presets": self.presets,
+            "audio": self.audio_settings,
+            "audio_latency_ms": self.audio_latency_ms,
+            "premixed_cues": self.premixed_cues,
+            "control_port": self.control_port
+        }
+
     def save_settings(self):
-        settings_path = os.path.join(get_external_dir(), 'settings.json')
-        try:
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                data = {
-                    "start_hotkey": self.start_hotkey,
-                    "circlec_hotkey": self.circlec_hotkey,
-                    "circlec_loop_time": self.circlec_loop_time,
-                    "circlec_first_time": self.circlec_first_time,
-                    "start_hotkey_enabled": self.start_hotkey_enabled,
-                    "circlec_hotkey_enabled": self.circlec_hotkey_enabled,
-                    "language": self.language,
-                    "presets": self.presets,
-                    "audio": self.audio_settings,
-                    "label3_circled_phases": self.label3_circled_phases,
-                    "label3_start_phases": self.label3_start_phases
-                }
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-
-    def load_audio_files(self):
-        ext_dir = get_external_dir()
-        path_5s_red = os.path.join(ext_dir, self.audio_settings.get("warning_5s_red", "sounds/warning_5s_red.wav"))
-        path_5s_yellow = os.path.join(ext_dir, self.audio_settings.get("warning_5s_yellow", "sounds/warning_5s_yellow.wav"))
-        path_5s_circlec = os.path.join(ext_dir, self.audio_settings.get("warning_5s_circlec", "sounds/warning_5s_circleC.wav"))
-        path_5s_slow = os.path.join(ext_dir, self.audio_settings.get("warning_5s_slow", "sounds/warning_5s_slow.wav"))
-        path_5s_fast = os.path.join(ext_dir, self.audio_settings.get("warning_5s_fast", "sounds/warning_5s_fast.wav"))
-        path_5s_rainbow = os.path.join(ext_dir, self.audio_settings.get("warning_5s_rainbow", "sounds/warning_5s_rainbow.wav"))
-        
-        # Standard fallback for all 5s warnings
-        std_fallback = os.path.join(ext_dir, "sounds/warning_5s.wav")
-        
-        def set_p_source(player, path):
-            if os.path.exists(path):
-                player.setSource(QUrl.fromLocalFile(path))
-            elif os.path.exists(std_fallback):
-                player.setSource(QUrl.fromLocalFile(std_fallback))
-
-        set_p_source(self.player_5s_red, path_5s_red)
-        set_p_source(self.player_5s_yellow, path_5s_yellow)
-        set_p_source(self.player_5s_circlec, path_5s_circlec)
-        set_p_source(self.player_5s_slow, path_5s_slow)
-        set_p_source(self.player_5s_fast, path_5s_fast)
-        set_p_source(self.player_5s_rainbow, path_5s_rainbow)
-        
-        path_count = os.path.join(ext_dir, self.audio_settings.get("count_321", "sounds/count.wav"))
-        path_end = os.path.join(ext_dir, self.audio_settings.get("end_0s", "sounds/end.wav"))
-        
-        if os.path.exists(path_count): self.player_count.setSource(QUrl.fromLocalFile(path_count))
-        if os.path.exists(path_end): self.player_end.setSource(QUrl.fromLocalFile(path_end))
+        # Returns immediately; SettingsWriter snapshots the data and writes it later
+        self.settings_writer.save(self.settings_data())
+
+    def load_audio_files(self, keys=None):
+        # Decodes every sound, or only `keys`; safe to run off the GUI thread
+        load_cue_sounds(self.mixer, get_external_dir(), self.audio_settings, keys)
 
     def init_ui(self):
         central_widget = QWidget()
@@ -871,25 +931,12 @@ class CountdownTimerApp(QMainWindow):
         top_layout.setSpacing(10)
         top_layout.addStretch()
         
+        self.preset_layout = QHBoxLayout()
+        self.preset_layout.setSpacing(10)
         self.preset_buttons = []
-        for i, preset in enumerate(self.presets):
-            if i == 2:
-                # Label 3: Show dual phases at startup (v1.7.1)
-                btn_text = f"{preset['label']} ({self.label3_start_phases[0]:.2f}/{self.label3_start_phases[1]:.2f})"
-            else:
-                btn_text = f"{preset['label']} ({preset['time']:.2f}s)"
-            btn = QPushButton(btn_text)
-            btn.setObjectName("PresetButton")
-            btn.setProperty("active", "false")
-            btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            
-            # Context menu for right click
-            btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-            btn.customContextMenuRequested.connect(lambda pos, idx=i: self.show_preset_context_menu(idx))
-            
-            top_layout.addWidget(btn)
-            self.preset_buttons.append(btn)
-            
+        self.rebuild_preset_buttons()
+        
+        top_layout.addLayout(self.preset_layout)
         top_layout.addStretch()
         main_layout.addLayout(top_layout)
         
@@ -919,31 +966,11 @@ class CountdownTimerApp(QMainWindow):
         middle_layout.addLayout(vol_layout)
         middle_layout.addStretch()
         
-        # Main Display Frame
-        self.display_frame = QFrame()
-        self.display_frame.setObjectName("DisplayFrame")
-        self.display_frame.setFixedSize(450, 150)
-        self.display_frame.setProperty("warning", "none")
+        # Main Display (custom painted: digits, border and bar in one widget)
+        self.display = CountdownDisplay()
+        self.display.setFixedSize(450, 150)
         
-        display_layout = QVBoxLayout(self.display_frame)
-        display_layout.setContentsMargins(10, 10, 10, 10)
-        
-        self.time_label = QLabel("00.00")
-        self.time_label.setObjectName("TimeLabel")
-        self.time_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.time_label.setProperty("warning", "none")
-        
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setObjectName("ProgressBar")
-        self.progress_bar.setTextVisible(False)
-        self.progress_bar.setRange(0, 1000)
-        self.progress_bar.setValue(1000)
-        self.progress_bar.setProperty("warning", "none")
-        
-        display_layout.addWidget(self.time_label)
-        display_layout.addWidget(self.progress_bar)
-        
-        middle_layout.addWidget(self.display_frame)
+        middle_layout.addWidget(self.display)
         middle_layout.addStretch()
         
         main_layout.addLayout(middle_layout)
@@ -977,7 +1004,7 @@ class CountdownTimerApp(QMainWindow):
         self.circlec_btn = QPushButton()
         self.circlec_btn.setObjectName("CircleCButton")
         self.circlec_btn.setFixedSize(140, 60)
-        self.circlec_btn.clicked.connect(self.start_circlec_timer)
+        self.circlec_btn.clicked.connect(lambda: self.start_circlec_timer())
         self.circlec_btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.circlec_btn.customContextMenuRequested.connect(self.show_circlec_context_menu)
         self.circlec_btn.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -1019,6 +1046,14 @@ class CountdownTimerApp(QMainWindow):
         latency_layout.addLayout(slider_row)
         latency_layout.addWidget(self.latency_val_label)
         
+        # Debug readout (RUBE_TIMER_DEBUG=1): measured hotkey queue delay
+        self.last_hotkey_delay_ms = 0.0
+        self.debug_label = QLabel("")
+        self.debug_label.setObjectName("SmallLabel")
+        self.debug_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.debug_label.setVisible(DEBUG)
+        latency_layout.addWidget(self.debug_label)
+        
         bottom_layout.addLayout(latency_layout)
         
         main_layout.addLayout(bottom_layout)
@@ -1027,21 +1062,46 @@ class CountdownTimerApp(QMainWindow):
         self.retranslate_ui()
         
         # Event bindings
-        for i, btn in enumerate(self.preset_buttons):
-            btn.clicked.connect(lambda checked, idx=i: self.select_preset(idx))
-            
-        self.start_btn.clicked.connect(self.start_timer)
+        self.start_btn.clicked.connect(lambda: self.start_timer())
         self.stop_btn.clicked.connect(self.stop_timer)
         self.vol_slider.valueChanged.connect(self.update_volume)
         self.latency_slider.valueChanged.connect(self.update_latency_label)
         self.latency_slider.sliderPressed.connect(self.record_latency_start)
         self.latency_slider.sliderReleased.connect(self.apply_latency)
 
+    def preset_button_text(self, index):
+        preset = self.presets[index]
+        phases = timed_phases(preset, MODE_NORMAL)
+        if phases:
+            # Presets with a phase program show each phase's length
+            return f"{preset['label']} ({phase_times_text(phases)})"
+        return f"{preset['label']} ({float(preset['time']):.2f}s)"
+
+    def rebuild_preset_buttons(self):
+        # Only needed when the number of presets changes; otherwise setText
+        for btn in self.preset_buttons:
+            self.preset_layout.removeWidget(btn)
+            btn.deleteLater()
+        self.preset_buttons = []
+        for i in range(len(self.presets)):
+            btn = QPushButton(self.preset_button_text(i))
+            btn.setObjectName("PresetButton")
+            btn.setProperty("active", "true" if i == self.current_preset_index else "false")
+            btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            btn.clicked.connect(lambda checked, idx=i: self.select_preset(idx))
+            
+            # Context menu for right click
+            btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            btn.customContextMenuRequested.connect(lambda pos, idx=i: self.show_preset_context_menu(idx))
+            
+            self.preset_layout.addWidget(btn)
+            self.preset_buttons.append(btn)
+
     def record_latency_start(self):
         self._slider_start_val = self.latency_slider.value() / 100.0
 
-    def trigger_hotkey_signal(self, key_name):
-        self.hotkey_pressed.emit(key_name)
+    def trigger_hotkey_signal(self, action, pressed_ns):
+        self.hotkey_pressed.emit(action, pressed_ns)
 
     def contextMenuEvent(self, event):
         # Open global settings on right click of the main window empty space
@@ -1050,89 +1110,314 @@ class CountdownTimerApp(QMainWindow):
             
         menu = QMenu(self)
         settings_action = menu.addAction("Settings")
+        calibrate_action = menu.addAction("Calibrate audio latency")
+        calibrate_action.setEnabled(self.audio_output is not None and self.calibration is None)
+        premix_action = menu.addAction("Pre-mixed cue tracks")
+        premix_action.setCheckable(True)
+        premix_action.setChecked(self.premixed_cues)
         
         action = menu.exec(event.globalPos())
         
-        if action == settings_action:
-            self.stop_keyboard_listener()
+        if action == calibrate_action:
+            self.start_calibration()
+        elif action == premix_action:
+            self.premixed_cues = premix_action.isChecked()
+            self.mixer.set_premix(self.premixed_cues)
+            self.save_settings()
+        elif action == settings_action:
+            self.pause_hotkeys()
                 
-            dialog = GlobalSettingsDialog(self, self)
+            # Built on first use and kept; only rebuilt when the preset count
+            # or language it was laid out for has changed
+            if self.settings_dialog is None or not self.settings_dialog.matches_app():
+                if self.settings_dialog is not None:
+                    self.settings_dialog.deleteLater()
+                self.settings_dialog = GlobalSettingsDialog(self, self)
+            dialog = self.settings_dialog
+            dialog.refresh()
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 new_data = dialog.get_data()
-                
-                self.presets = new_data['presets']
-                self.circlec_loop_time = float(new_data['circlec_loop_time'])
-                self.circlec_first_time = float(new_data['circlec_first_time'])
-                self.circlec_hotkey = str(new_data['circlec_hotkey'])
-                self.start_hotkey = str(new_data['start_hotkey'])
-                self.start_hotkey_enabled = bool(new_data['start_hotkey_enabled'])
-                self.circlec_hotkey_enabled = bool(new_data['circlec_hotkey_enabled'])
-                self.language = str(new_data['language'])
-                self.label3_circled_phases = new_data['label3_circled_phases']
-                self.label3_start_phases = new_data['label3_start_phases']
-                
-                self.save_settings()
-                self.retranslate_ui()
-                
-                # Update UI to reflect new settings
-                self.start_btn.setToolTip(f"Hotkey: {self.start_hotkey.upper()} (Right-click to edit)")
-                self.circlec_btn.setToolTip(f"Hotkey: {self.circlec_hotkey.upper()} (Right-click to edit)")
-                
-                for i, p in enumerate(self.presets):
-                    if i < len(self.preset_buttons):
-                        self.preset_buttons[i].setText(f"{p['label']} ({float(p['time']):.2f}s)")
-                    
-                # If stopped, re-select current preset to update display
-                self.select_preset(self.current_preset_index)
-                self.update_circlec_info_label()
-                
-            self.register_hotkey()
+                if new_data["changes"]:
+                    # Rebinds hotkeys itself if any of them changed
+                    self.apply_settings_changes(new_data["values"], new_data["changes"])
+                    self.save_settings()
+            # Dialog closed: presses count again (bindings are untouched)
+            self.hotkeys.resume()
 
     def register_hotkey(self):
-        self.stop_keyboard_listener()
-            
+        # Rebuild the key -> action table; the OS hook keeps running
+        bindings = {}
+        if self.circlec_hotkey_enabled and self.circlec_hotkey:
+            bindings[self.circlec_hotkey] = lambda key, pressed_ns: self.trigger_hotkey_signal("circlec", pressed_ns)
+        # START wins if both actions share a key
+        if self.start_hotkey_enabled and self.start_hotkey:
+            bindings[self.start_hotkey] = lambda key, pressed_ns: self.trigger_hotkey_signal("start", pressed_ns)
+        self.hotkeys.set_bindings(bindings)
+        self.hotkeys.resume()
+
+    def pause_hotkeys(self):
+        # Settings dialogs are open: ignore presses until register_hotkey()
+        self.hotkeys.pause()
+
+    def handle_hotkey_trigger(self, action, pressed_ns):
+        # Time the press spent in the hook thread and the queued signal
+        now_ns = time.monotonic_ns()
+        self.last_hotkey_delay_ms = (now_ns - pressed_ns) / 1e6
+        self.session_log.log(EV_HOTKEY, self.loop_count, pressed_ns, now_ns - pressed_ns, t_ns=now_ns)
+        if DEBUG:
+            self.debug_label.setText(f"hotkey queue {self.last_hotkey_delay_ms:.2f} ms")
+        if action == "start":
+            self.start_timer(pressed_ns)
+        elif action == "circlec":
+            self.start_circlec_timer(pressed_ns)
+
+    # --- Local control / telemetry API ---
+
+    def start_control_server(self):
+        # (Re)starts the server on control_port; asyncio is only imported when enabled
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server = None
+        if not self.control_port:
+            return
+        from control_server import ControlServer
+        server = ControlServer(self.control_command.emit, self.control_port)
+        if server.start():
+            self.control_server = server
+            self._published_state = None
+            self.publish_state()
+
+    def listen_for_instances(self, sock):
+        # Later launches forward their command line here (single_instance.py)
+        from single_instance import InstanceListener
+        self.instance_listener = InstanceListener(sock, self.control_command.emit)
+        self.instance_listener.start()
+
+    def handle_control_command(self, action, value):
+        # From the control API, forwarded launches and this launch's own arguments
+        if action == "show":
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+        elif action == "start":
+            self.start_timer()
+        elif action == "circlec":
+            self.start_circlec_timer()
+        elif action == "stop":
+            self.stop_timer()
+        elif action == "preset":
+            if 0 <= value < len(self.presets):
+                self.select_preset(value)
+        elif action == "nudge":
+            # Straight to the engine; the slider keeps the user's own adjustment
+            self.nudge(value)
+
+    def publish_state(self):
+        # Hands the state to the shared state file and control clients only
+        # when something they show changed: mode, loop, warning, a whole second
+        # of time_left or a moved deadline. Readers interpolate from end_ns.
+        if self.control_server is None and self.state_writer is None:
+            return
+        engine = self.engine
+        key = (engine.running, engine.mode, engine.preset_index, engine.loop_count, engine.warning,
+               math.ceil(engine.time_left()), engine.deadline.end_ns)
+        if key == self._published_state:
+            return
+        self._published_state = key
+        state = engine.snapshot()
+        if self.state_writer is not None:
+            self.state_writer.write(state)
+        if self.control_server is not None:
+            self.control_server.publish(state)
+
+    # --- Staged startup ---
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._startup_done:
+            self._startup_done = True
+            self.startup_times["first_paint_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+            # Let this frame reach the screen before starting the slow parts
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        # Hook and sound decoding run off the GUI thread; the output stream is
+        # opened on the GUI side in open_audio_output once decoding is done.
+        threading.Thread(target=self._load_in_background, name="StartupLoader", daemon=True).start()
+        self.start_control_server()
+
+    def _load_in_background(self):
+        self.hotkeys.start()
+        self.load_audio_files()
+        self.audio_loaded.emit()
+
+    def open_audio_output(self):
         try:
-            self.keyboard_listener = keyboard.Listener(on_press=self.on_press)
-            self.keyboard_listener.start()
+            if AUDIO_BACKEND == "null":
+                self.audio_output = NullSink(self.mixer)
+                self.audio_output.start()
+            else:
+                from audio_output import CueOutput
+                self.audio_output = CueOutput(self.mixer)
         except Exception as e:
-            print(f"Failed to catch keys: {e}")
+            print(f"Failed to open audio output: {e}")
+        self.apply_device_latency()
+        self.startup_times["audio_ready_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        if DEBUG:
+            print("Startup: " + ", ".join(f"{k} {v:.1f}" for k, v in self.startup_times.items()))
 
-    def stop_keyboard_listener(self):
-        if self.keyboard_listener is not None:
-            try:
-                self.keyboard_listener.stop()
-            except:
-                pass
-            self.keyboard_listener = None
+    # --- Settings hot reload ---
 
-    def on_press(self, key):
+    def reload_settings(self):
+        path = self.settings_path()
+        if os.path.exists(path) and path not in self.settings_watcher.files():
+            self.settings_watcher.addPath(path)
+        # Our own save is still in flight, or a dialog holds the old values:
+        # look again once that is over
+        if self.settings_writer.busy or QApplication.activeModalWidget() is not None:
+            self.reload_timer.start()
+            return
+        data = read_settings_file(path)
+        if data is None:
+            return
         try:
-            key_name = key.char
-        except AttributeError:
-            key_name = key.name
-            
-        key_str = str(key_name).lower()
-        # Priority resolution
-        if key_str == self.start_hotkey:
-            self.trigger_hotkey_signal(key_str)
-        elif key_str == self.circlec_hotkey:
-            self.trigger_hotkey_signal(key_str)
-
-    def handle_hotkey_trigger(self, key_name):
-        if key_name == self.start_hotkey and self.start_hotkey_enabled:
-            self.start_timer()
-        elif key_name == self.circlec_hotkey and self.circlec_hotkey_enabled:
-            self.start_circlec_timer()
+            new = normalize_settings(data)
+        except Exception as e:
+            print(f"Error parsing loaded settings: {e}")
+            return
+        changes = diff_settings(self.settings_data(), new)
+        if changes:
+            self.apply_settings_changes(new, changes)
+
+    def apply_settings_changes(self, new, changes):
+        # Applies only the fields in `changes` (see diff_settings). A running
+        # countdown keeps its deadline; new loop times take effect next loop.
+        if "presets" in changes and changes["presets"] is True and self.is_running \
+                and self.current_preset_index >= len(new["presets"]):
+            print("Ignoring settings reload: it removes the running preset")
+            changes = {k: v for k, v in changes.items() if k != "presets"}
+            if not changes:
+                return
+        for field in changes:
+            setattr(self, SETTINGS_ATTRS.get(field, field), new[field])
+        
+        if "presets" in changes:
+            if changes["presets"] is True:
+                self.rebuild_preset_buttons()
+            else:
+                for i in changes["presets"]:
+                    self.preset_buttons[i].setText(self.preset_button_text(i))
+        
+        if "audio" in changes:
+            keys = None if changes["audio"] is True else changes["audio"]
+            threading.Thread(target=self.load_audio_files, args=(keys,), daemon=True).start()
+        
+        if "audio_latency_ms" in changes:
+            self.apply_device_latency()
+        
+        if "premixed_cues" in changes:
+            self.mixer.set_premix(self.premixed_cues)
+        
+        if "control_port" in changes:
+            self.start_control_server()
+        
+        if {"start_hotkey", "circlec_hotkey", "start_hotkey_enabled", "circlec_hotkey_enabled"} & set(changes):
+            self.register_hotkey()
+            self.start_btn.setToolTip(f"Hotkey: {self.start_hotkey.upper()} (Right-click to edit)")
+            self.circlec_btn.setToolTip(f"Hotkey: {self.circlec_hotkey.upper()} (Right-click to edit)")
+        
+        if "language" in changes:
+            # Also refreshes the CircleC button label
+            self.retranslate_ui()
+        elif {"circlec_loop_time", "presets"} & set(changes):
+            self.update_circlec_info_label()
+        
+        if self.is_running:
+            if {"presets", "circlec_loop_time", "circlec_first_time"} & set(changes):
+                self.engine.reload_program()
+                self.set_warning_visuals(self.engine.warning)
+            # Cues of the next loop may have moved
+            self.reschedule_cues()
+        elif self.presets:
+            index = min(self.current_preset_index, len(self.presets) - 1)
+            preset_changed = "presets" in changes and (changes["presets"] is True or index in changes["presets"])
+            if index != self.current_preset_index:
+                self.select_preset(index)
+            elif preset_changed or "language" in changes:
+                if preset_changed:
+                    self.engine.reset_idle()
+                    self.update_display()
+                self.start_btn.setText(f"{self.tr('start_btn')}\n({self.presets[index]['time']:.2f}s)")
+
+    # --- Output latency calibration ---
+
+    def audio_device_name(self):
+        return getattr(self.audio_output, "device_name", None)
+
+    def apply_device_latency(self):
+        # Scheduled cues play early by the calibrated latency of the current
+        # device; independent of the manual latency slider
+        ms = self.audio_latency_ms.get(self.audio_device_name(), 0.0)
+        self.mixer.set_device_latency_ms(float(ms))
+
+    def start_calibration(self):
+        output = self.audio_output
+        if output is None or self.is_running or self.calibration is not None:
+            return
+        capture = output.loopback_capture() if hasattr(output, "loopback_capture") else output
+        try:
+            self.calibration = LatencyCalibration(self.mixer, capture)
+            wait_ms = self.calibration.begin()
+        except Exception as e:
+            self.calibration = None
+            QMessageBox.warning(self, "Audio latency", f"Could not start the loopback capture: {e}")
+            return
+        # The clicks own the mixer schedule until finish(): no countdown meanwhile
+        self.pause_hotkeys()
+        self.start_btn.setEnabled(False)
+        self.circlec_btn.setEnabled(False)
+        QTimer.singleShot(wait_ms, self.finish_calibration)
+
+    def finish_calibration(self):
+        calibration, self.calibration = self.calibration, None
+        latency = calibration.finish()
+        self.start_btn.setEnabled(True)
+        self.circlec_btn.setEnabled(True)
+        self.register_hotkey()
+        device = self.audio_device_name()
+        if latency is None:
+            QMessageBox.warning(self, "Audio latency",
+                                f"No clicks were picked up from {device}. Check that a loopback "
+                                "(or a microphone near the speakers) is the default input.")
+            return
+        self.audio_latency_ms = dict(self.audio_latency_ms)
+        self.audio_latency_ms[device] = round(latency, 1)
+        self.apply_device_latency()
+        self.save_settings()
+        QMessageBox.information(self, "Audio latency",
+                                f"{device}: {latency:.1f} ms. Cues now play that much early on this device.")
 
     def closeEvent(self, event):
-        self.stop_keyboard_listener()
+        if DEBUG:
+            print(f"Render stats: {self.render_tracker.stats()}")
+        self.hotkeys.stop()
+        if self.control_server is not None:
+            self.control_server.stop()
+        if self.instance_listener is not None:
+            self.instance_listener.stop()
+        if self.state_writer is not None:
+            self.state_writer.close()
+        self.settings_writer.close()
+        self.session_log.close()
+        if self.audio_output is not None:
+            self.audio_output.stop()
         super().closeEvent(event)
 
     def open_hotkey_edit_start(self):
         if self.is_running:
             return
             
-        self.stop_keyboard_listener()
+        self.pause_hotkeys()
             
         dialog = HotkeyEditDialog(self.start_hotkey, self.start_hotkey_enabled, self)
         dialog.setWindowTitle(self.tr("start_btn") + " " + self.tr("settings"))
@@ -1152,7 +1437,7 @@ class CountdownTimerApp(QMainWindow):
         if self.is_running:
             return
             
-        self.stop_keyboard_listener()
+        self.pause_hotkeys()
             
         dialog = HotkeyEditDialog(self.circlec_hotkey, self.circlec_hotkey_enabled, parent=self)
         dialog.setWindowTitle(self.tr("circlec_btn") + " " + self.tr("settings"))
@@ -1165,9 +1450,11 @@ class CountdownTimerApp(QMainWindow):
                 self.circlec_loop_time = dialog.time_edit_loop.value()
                 self.circlec_first_time = dialog.time_edit_first.value()
             self.save_settings()
-            self.register_hotkey()
             self.update_circlec_info_label()
             self.update_display()
+            
+        # Re-enable hotkeys even when cancelled
+        self.register_hotkey()
 
     def show_preset_context_menu(self, index):
         if self.is_running:
@@ -1183,36 +1470,26 @@ class CountdownTimerApp(QMainWindow):
         )
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            new_label = dialog.label_edit.text()
-            new_time = dialog.time_edit.value()
-            new_first_time = dialog.first_time_edit.value()
-            
             # Update data
-            self.presets[index]['label'] = new_label
-            self.presets[index]['time'] = new_time
-            self.presets[index]['first_time'] = new_first_time
-            
-            if index == 2:
-                self.label3_start_phases = [dialog.st_a_edit.value(), dialog.st_b_edit.value()]
-                # Update main loop time for display to match first phase or average?
-                # User said "move yellow/rainbow here", maybe just keep existing time or use yellow.
-                # Let's use avg for the button label but keep logic as is.
-                new_time = dialog.st_a_edit.value() 
-                self.presets[index]['time'] = new_time
+            preset['label'] = dialog.label_edit.text()
+            preset['first_time'] = dialog.first_time_edit.value()
+            phases = timed_phases(preset, MODE_NORMAL)
+            if phases:
+                for spec, edit in zip(phases, dialog.phase_edits):
+                    spec['time'] = edit.value()
+                # The idle display shows the first phase's length
+                preset['time'] = phases[0]['time']
+            else:
+                preset['time'] = dialog.time_edit.value()
             
             self.save_settings()
             
             # Update UI button
-            btn = self.preset_buttons[index]
-            if index == 2:
-                btn.setText(f"{new_label} ({self.label3_start_phases[0]:.2f}/{self.label3_start_phases[1]:.2f})")
-            else:
-                btn.setText(f"{new_label} ({new_time:.2f}s)")
+            self.preset_buttons[index].setText(self.preset_button_text(index))
             
             # If current preset, update display
             if self.current_preset_index == index:
-                self.initial_time = new_time
-                self.time_left = new_time
+                self.engine.reset_idle()
                 self.update_display()
 
     def show_circlec_context_menu(self, pos):
@@ -1224,30 +1501,27 @@ class CountdownTimerApp(QMainWindow):
             data = dialog.get_data()
             self.circlec_hotkey = data["hotkey"]
             self.circlec_hotkey_enabled = data["enabled"]
-            if self.current_preset_index == 2:
-                self.label3_circled_phases = data["label3_circled_phases"]
-                self.circlec_first_time = data["circlec_first_time"]
+            if "phases" in data:
+                preset = self.presets[self.current_preset_index]
+                for spec, value in zip(timed_phases(preset, MODE_CIRCLEC), data["phases"]):
+                    spec['time'] = value
             else:
                 self.circlec_loop_time = data["circlec_loop_time"]
-                self.circlec_first_time = data["circlec_first_time"]
+            self.circlec_first_time = data["circlec_first_time"]
             
             self.save_settings()
-            self.register_hotkey() # Refresh hotkey listener
+            self.register_hotkey() # Refresh hotkey bindings
             self.update_circlec_info_label()
 
     def select_preset(self, index):
-        if self.is_running:
+        # Display the loop time when selected/not running
+        if not self.engine.select_preset(index):
             return 
+        self.session_log.log(EV_PRESET, b_ns=index)
             
-        self.current_preset_index = index
         preset = self.presets[index]
-        self.initial_time = float(preset['time'])
-        
-        # Display the loop time when selected/not running
-        self.time_left = self.initial_time
-        self.loop_count = 1 
-        self.reset_triggers()
-        self.latency_slider.setValue(0)
+        self.set_warning_visuals("none")
+        self.reset_latency_slider()
         self.update_display()
         
         # Update button styles
@@ -1263,9 +1537,9 @@ class CountdownTimerApp(QMainWindow):
 
     def update_circlec_info_label(self):
         if not self.is_running or self.timer_mode != "circlec":
-            if self.current_preset_index == 2:
-                # Label 3: Show dual times with 2 decimals (v1.6.9)
-                self.circlec_btn.setText(f"{self.tr('circlec_btn')}\n({self.label3_circled_phases[0]:.2f}/{self.label3_circled_phases[1]:.2f})")
+            phases = timed_phases(self.presets[self.current_preset_index], MODE_CIRCLEC)
+            if phases:
+                self.circlec_btn.setText(f"{self.tr('circlec_btn')}\n({phase_times_text(phases)})")
             else:
                 self.circlec_btn.setText(f"{self.tr('circlec_btn')}\n({self.circlec_loop_time:.2f}s)")
         else:
@@ -1283,13 +1557,6 @@ class CountdownTimerApp(QMainWindow):
         self.vol_title_label.setText(self.tr("volume_label"))
         self.update_circlec_info_label()
 
-    def reset_triggers(self):
-        self.warning_triggered = False
-        self.count_3_triggered = False
-        self.count_2_triggered = False
-        self.count_1_triggered = False
-        self.set_warning_visuals("none")
-
     def update_latency_label(self, value):
         float_val = value / 100.0
         sign = "+" if float_val > 0 else ""
@@ -1297,236 +1564,155 @@ class CountdownTimerApp(QMainWindow):
 
     def apply_latency(self):
         current_val = self.latency_slider.value() / 100.0
-        diff = current_val - self._slider_start_val
-        if diff != 0 and self.is_running:
-            self.time_left += diff
-            self.update_display()
-            if self.time_left > 5.0 and self.warning_triggered:
-                self.warning_triggered = False
-                self.set_warning_visuals("none")
-            if self.time_left > 3.0: self.count_3_triggered = False
-            if self.time_left > 2.0: self.count_2_triggered = False
-            if self.time_left > 1.0: self.count_1_triggered = False
-            
+        self.nudge(current_val - self._slider_start_val)
         # Update the start value so subsequent tweaks work correctly without needing to re-click
         self._slider_start_val = current_val
 
+    def nudge(self, seconds):
+        # Moves the running deadline; the engine re-arms any cue that is ahead of it
+        if seconds == 0 or not self.is_running:
+            return
+        self.engine.nudge(seconds)
+        self.session_log.log(EV_NUDGE, self.loop_count, seconds_to_ns(seconds),
+                             self.engine.deadline.remaining_ns())
+        self.reschedule_cues()
+        # Re-armed warning cues take their colour back with them
+        self.set_warning_visuals(self.engine.warning)
+        self.update_display()
+
+    def reset_latency_slider(self):
+        # Zeroes the slider and the value apply_latency measures from, together
+        self.latency_slider.setValue(0)
+        self._slider_start_val = 0.0
+
     def update_volume(self, value):
-        vol = value / 100.0
-        self.audio_out_5s_red.setVolume(vol)
-        self.audio_out_5s_yellow.setVolume(vol)
-        self.audio_out_5s_circlec.setVolume(vol)
-        self.audio_out_5s_slow.setVolume(vol)
-        self.audio_out_5s_fast.setVolume(vol)
-        self.audio_out_5s_rainbow.setVolume(vol)
-        self.audio_out_count.setVolume(vol)
-        self.audio_out_end.setVolume(vol)
-
-    def start_timer(self):
-        # NORMAL start interrupts circlec if it's running
-        was_circlec = (self.is_running and self.timer_mode == "circlec")
-        
-        if not self.is_running or was_circlec:
-            self.is_running = True
-            self.timer_mode = "normal"
-            
-            preset = self.presets[self.current_preset_index]
-            self.initial_time = float(preset['time'])
-            
-            # If completely fresh OR interrupting circlec, apply normal first_time
-            fresh_start = (self.loop_count == 1 and abs(self.time_left - self.initial_time) < 0.001)
-            if fresh_start or was_circlec:
-                self.time_left = float(preset.get('first_time', 5.00))
-                self.loop_count = 1
-                self.reset_triggers()
-                self.update_display()
+        self.mixer.set_volume(value / 100.0)
+
+    def start_timer(self, pressed_ns=None):
+        # NORMAL start interrupts circlec if it's running; always begins with first_time.
+        # Hotkey starts are backdated to the press so the queue delay is not lost.
+        if self.calibration is not None:
+            return  # forwarded launches and the control API during calibration
+        if self.engine.start(pressed_ns):
+            self.log_start(EV_START)
+            self.set_warning_visuals("none")
             
             # Reset latency slider strictly upon START tracking
-            self.latency_slider.setValue(0)
+            self.reset_latency_slider()
             self.latency_slider.setEnabled(True)
-            self._slider_start_val = 0.0
             
             self.start_btn.setText(self.tr("running"))
             self.start_btn.setStyleSheet("color: #ffffff; border-color: #ffffff;")
             self.update_circlec_info_label()
             self.circlec_btn.setStyleSheet("")
-            self.timer.start()
+            self.reschedule_cues()
+            self.update_timer()
+            self.start_tick()
 
-    def start_circlec_timer(self):
-        if not self.is_running and self.time_left > 0:
-            self.is_running = True
-            self.timer_mode = "circlec"
-            
-            self.initial_time = self.circlec_loop_time
-            self.time_left = self.circlec_first_time
-            self.loop_count = 1
-            self.reset_triggers()
-            self.update_display()
+    def start_circlec_timer(self, pressed_ns=None):
+        if self.calibration is not None:
+            return
+        if self.engine.start_circlec(pressed_ns):
+            self.log_start(EV_CIRCLEC)
+            self.set_warning_visuals("none")
             
-            self.latency_slider.setValue(0)
+            self.reset_latency_slider()
             self.latency_slider.setEnabled(True)
-            self._slider_start_val = 0.0
             
             self.circlec_btn.setText("C-RUN")
             self.circlec_btn.setStyleSheet("border-color: #ffffff;") # Maintain neon yellow text from QSS, just white border
             self.start_btn.setText("START")
             self.start_btn.setStyleSheet("")
-            self.timer.start()
+            self.reschedule_cues()
+            self.update_timer()
+            self.start_tick()
+
+    def log_start(self, kind):
+        engine = self.engine
+        start_ns = engine.deadline.end_ns - seconds_to_ns(engine.loop_length)
+        self.session_log.log(kind, engine.loop_count, start_ns, engine.preset_index,
+                             code=1 if engine.mode == MODE_CIRCLEC else 0)
+
+    def start_tick(self):
+        screen = self.screen()
+        self.timer.start(frame_interval_ms(screen.refreshRate() if screen else 0))
 
     def stop_timer(self):
-        self.is_running = False
-        self.timer_mode = "normal"
+        if self.is_running:
+            self.session_log.log(EV_STOP, self.loop_count)
+        self.engine.stop()
         self.timer.stop()
+        self.reschedule_cues()
         self.start_btn.setText("START")
         self.start_btn.setStyleSheet("") 
         self.update_circlec_info_label()
         self.circlec_btn.setStyleSheet("") 
         
-        # Revert to loop time when stopped (as requested v1.6.6)
-        preset = self.presets[self.current_preset_index]
-        self.initial_time = float(preset['time'])
-        self.time_left = self.initial_time
-        self.loop_count = 1
-        self.reset_triggers()
-        self.latency_slider.setValue(0)
+        # Engine reverts to loop time when stopped (as requested v1.6.6)
+        self.reset_latency_slider()
         self.latency_slider.setEnabled(False)
         self.set_warning_visuals("none") # Clear color warnings
         self.update_display()
         self.update_circlec_info_label()
 
     def update_timer(self):
-        self.time_left -= 0.01
-        
-        # Audio Triggers
-        # Slightly larger buffer (5.05) to ensure trigger if starting exactly at 5.0
-        if self.time_left <= 5.05 and not self.warning_triggered:
-            self.warning_triggered = True
-            
-            # Label 3 specific logic (Highest priority)
-            if self.current_preset_index == 2:
-                if self.timer_mode == "circlec":
-                    # CircleD (CircleC) Logic: Phase 1 (5s), Phase 2 (Slow), Phase 3 (Fast)
-                    if self.loop_count == 1:
-                        self.set_warning_visuals("red")
-                        self.player_5s_circlec.setPosition(0)
-                        self.player_5s_circlec.play()
-                    elif self.loop_count % 2 == 0:
-                        self.set_warning_visuals("yellow")
-                        self.player_5s_slow.setPosition(0)
-                        self.player_5s_slow.play()
-                    else:
-                        self.set_warning_visuals("red")
-                        self.player_5s_fast.setPosition(0)
-                        self.player_5s_fast.play()
-                else:
-                    # START Logic: Phase 1 (Red), Phase 2 (Yellow), Phase 3 (Rainbow)
-                    if self.loop_count == 1:
-                        self.set_warning_visuals("red")
-                        self.player_5s_red.setPosition(0)
-                        self.player_5s_red.play()
-                    elif self.loop_count % 2 == 0:
-                        self.set_warning_visuals("yellow")
-                        self.player_5s_yellow.setPosition(0)
-                        self.player_5s_yellow.play()
-                    else:
-                        self.set_warning_visuals("red") # Visual is red as requested
-                        self.player_5s_red.setPosition(0)
-                        self.player_5s_red.play()
-            
-            # Global default logic for other presets
-            elif self.timer_mode == "circlec":
-                self.set_warning_visuals("red")
-                self.player_5s_circlec.setPosition(0)
-                self.player_5s_circlec.play()
-            else:
-                # Presets 1 & 2: 3-loop cycle (Red -> Red -> Yellow)
-                mod_val = self.loop_count % 3
-                if mod_val == 1 or mod_val == 2:
-                    self.set_warning_visuals("red")
-                    self.player_5s_red.setPosition(0)
-                    self.player_5s_red.play()
-                else:
-                    self.set_warning_visuals("yellow")
-                    self.player_5s_yellow.setPosition(0)
-                    self.player_5s_yellow.play()
-            
-        if self.time_left <= 3.01 and not self.count_3_triggered:
-            self.count_3_triggered = True
-            self.player_count.setPosition(0)
-            self.player_count.play()
-            
-        if self.time_left <= 2.01 and not self.count_2_triggered:
-            self.count_2_triggered = True
-            self.player_count.setPosition(0)
-            self.player_count.play()
-            
-        if self.time_left <= 1.01 and not self.count_1_triggered:
-            self.count_1_triggered = True
-            self.player_count.setPosition(0)
-            self.player_count.play()
-
-        # End of countdown
-        if self.time_left <= 0:
-            self.time_left = 0
-            self.player_end.setPosition(0)
-            self.player_end.play()
-            self.update_display()
-            self.restart_countdown()
-            return
-            
+        for event in self.engine.update():
+            self.handle_cue(event)
         self.update_display()
 
+    def handle_cue(self, event):
+        # Sounds are already scheduled in the mixer; the tick only drives visuals
+        if event.kind == CUE_LOOP:
+            self.session_log.log(EV_LOOP, event.loop_count, event.scheduled_ns, t_ns=event.fired_ns)
+        else:
+            self.session_log.log(EV_CUE, event.loop_count, event.scheduled_ns,
+                                 event.fired_ns - event.scheduled_ns, sound_code(event.sound), event.fired_ns)
+        if event.kind == CUE_WARNING:
+            self.set_warning_visuals(event.visual)
+        elif event.kind == CUE_LOOP:
+            self.restart_countdown()
+
+    def reschedule_cues(self):
+        # Hand the mixer every cue of this loop and the next at its exact time.
+        # Rebuilt on start, on each loop boundary and whenever the deadline moves.
+        if self.is_running:
+            self.mixer.schedule(self.engine.upcoming_cues())
+        elif self.calibration is None:
+            # During calibration the schedule holds the clicks: a STOP or
+            # preset change must not clear them
+            self.mixer.clear_schedule()
+
     def restart_countdown(self):
-        self.loop_count += 1 
-        
-        if self.current_preset_index == 2:
-            # Multi-phase logic for Label 3
-            if self.timer_mode == "circlec":
-                # CircleD: alternating A and B
-                self.initial_time = self.label3_circled_phases[0] if self.loop_count % 2 == 0 else self.label3_circled_phases[1]
-            else:
-                # START: alternating A and B
-                self.initial_time = self.label3_start_phases[0] if self.loop_count % 2 == 0 else self.label3_start_phases[1]
-        
-        self.time_left = self.initial_time
-        self.reset_triggers()
-        self.latency_slider.setValue(0)
-        self.update_display()
+        # The engine has already carried the deadline into the next loop
+        self.set_warning_visuals("none")
+        self.reset_latency_slider()
+        self.reschedule_cues()
 
     def set_warning_visuals(self, status):
-        self.display_frame.setProperty("warning", status)
-        self.time_label.setProperty("warning", status)
-        self.progress_bar.setProperty("warning", status)
-        
-        self.display_frame.style().unpolish(self.display_frame)
-        self.display_frame.style().polish(self.display_frame)
-        self.time_label.style().unpolish(self.time_label)
-        self.time_label.style().polish(self.time_label)
-        self.progress_bar.style().unpolish(self.progress_bar)
-        self.progress_bar.style().polish(self.progress_bar)
+        # Swaps a pre-built theme; no stylesheet re-resolve or relayout
+        self.display.set_warning(status)
 
     def update_display(self):
-        if self.time_left < 0:
-            self.time_left = 0
-        self.time_label.setText(f"{self.time_left:05.2f}")
-        
-        # We need to compute progress base on whether it's the very first loop or subsequent loops
-        # If we are stopped and at the start, max_time matches what is displayed (initial_time)
-        if self.loop_count == 1:
-            if not self.is_running:
-                max_time = self.time_left # Full bar at idle
-            elif self.timer_mode == "circlec":
-                max_time = self.circlec_first_time
-            else:
-                preset = self.presets[self.current_preset_index]
-                max_time = float(preset.get('first_time', 5.00))
-        else:
-            max_time = self.initial_time
-        
-        if max_time > 0:
-            progress_val = int((self.time_left / max_time) * 1000)
-            self.progress_bar.setValue(progress_val)
-
+        time_left = self.time_left
+        text = f"{time_left:05.2f}"
+        
+        # Bar is relative to the current loop (first_time on loop 1, full at idle)
+        max_time = self.engine.loop_length
+        progress_val = int((time_left / max_time) * 1000) if max_time > 0 else None
+        
+        # Only push what would look different: the string, and the bar fill in pixels
+        tracker = self.render_tracker
+        text_dirty = tracker.changed("text", text)
+        if text_dirty:
+            self.display.set_text(text)
+        bar_dirty = False
+        if progress_val is not None:
+            bar_px = progress_val * self.display.bar_width() // 1000
+            bar_dirty = tracker.changed("bar", bar_px)
+            if bar_dirty:
+                self.display.set_value(progress_val)
+        tracker.frame(text_dirty or bar_dirty)
+        self.publish_state()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -1540,4 +1726,9 @@ if __name__ == '__main__':
         
     window = CountdownTimerApp()
     window.show()
+    if INSTANCE_SOCKET is not None:
+        window.listen_for_instances(INSTANCE_SOCKET)
+    # This launch's own --start / --preset ... run once the event loop is up
+    for action, value in LAUNCH_COMMANDS:
+        window.control_command.emit(action, value)
     sys.exit(app.exec())
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+
+import timer_engine
+from timer_engine import NS_PER_SEC
+
+# Replays recorded inputs (preset picks, START/CircleC/STOP, latency nudges)
+# through CountdownEngine on a simulated clock and returns the cue timeline
+# the live app produced for them. Input comes from a session log
+# (logs/session-*.rlog or its JSON Lines export).
+#
+#   python replay.py logs/session-X.rlog --settings settings.json --output cues.jsonl
+#   python replay.py logs/session-X.rlog --against ../old-checkout   # diff two versions
+
+INPUT_EVENTS = ("preset", "start", "circlec", "stop", "nudge")
+
+FALLBACK_STEP_NS = 1_000_000
+
+
+def read_inputs(path):
+    # [(t_ns, action, value)] sorted by time; outputs of the old run are ignored
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        from session_log import read_records
+        records = list(read_records(path))
+    inputs = []
+    for r in records:
+        event = r["event"]
+        if event not in INPUT_EVENTS:
+            continue
+        if event == "preset":
+            inputs.append((r["t_ns"], event, r["preset_index"]))
+        elif event in ("start", "circlec"):
+            # Starts are backdated to the key press; replay from that instant
+            inputs.append((r["start_ns"], event, None))
+        elif event == "nudge":
+            inputs.append((r["t_ns"], event, r["shift_ns"] / NS_PER_SEC))
+        else:
+            inputs.append((r["t_ns"], event, None))
+    inputs.sort(key=lambda item: item[0])
+    return inputs
+
+
+def load_engine_module(checkout=None):
+    # timer_engine from this tree, or from another checkout to compare versions
+    if checkout is None:
+        return timer_engine
+    path = os.path.join(checkout, "timer_engine.py")
+    spec = importlib.util.spec_from_file_location(f"timer_engine_{abs(hash(path))}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def replay(inputs, settings_data=None, engine_module=timer_engine, until_ns=None, speed=None):
+    # Runs the inputs and returns the cue timeline as dicts with times relative
+    # to the first input. speed=None runs as fast as possible; speed=1000 paces
+    # the replay at 1000x real time.
+    if not inputs:
+        return []
+    settings = engine_module.TimerSettings.from_dict(settings_data or {})
+    origin_ns = inputs[0][0]
+    clock = engine_module.SimulatedClock(origin_ns)
+    engine = engine_module.CountdownEngine(settings, clock)
+    engine.select_preset(0)
+    if until_ns is None:
+        until_ns = inputs[-1][0]
+    wall_start = time.perf_counter()
+
+    timeline = []
+
+    # Older engines have no next_due_ns(); tick those every FALLBACK_STEP_NS instead
+    next_due = getattr(engine, "next_due_ns", None)
+    if next_due is None:
+        def next_due():
+            return clock.now_ns + FALLBACK_STEP_NS if engine.running else None
+
+    def run_to(target_ns):
+        # Step from cue to cue, as a perfectly punctual tick would
+        while True:
+            due_ns = next_due()
+            if due_ns is None or due_ns > target_ns:
+                break
+            clock.now_ns = max(clock.now_ns, due_ns)
+            for event in engine.update():
+                timeline.append({
+                    "t_ms": (event.scheduled_ns - origin_ns) / 1e6,
+                    "kind": event.kind,
+                    "sound": event.sound,
+                    "visual": event.visual,
+                    "loop": event.loop_count,
+                })
+        clock.now_ns = max(clock.now_ns, target_ns)
+        if speed:
+            ahead = (clock.now_ns - origin_ns) / NS_PER_SEC / speed - (time.perf_counter() - wall_start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    for t_ns, action, value in inputs:
+        run_to(t_ns)
+        if action == "preset":
+            engine.select_preset(value)
+        elif action == "start":
+            engine.start(t_ns)
+        elif action == "circlec":
+            engine.start_circlec(t_ns)
+        elif action == "stop":
+            engine.stop()
+        elif action == "nudge":
+            engine.nudge(value)
+    run_to(until_ns)
+    return timeline
+
+
+def compare_timelines(a, b, tolerance_ms=0.0):
+    # First index where the two timelines disagree, with both entries; None if equal
+    for i, (x, y) in enumerate(zip(a, b)):
+        same_time = abs(x["t_ms"] - y["t_ms"]) <= tolerance_ms
+        if not same_time or {k: v for k, v in x.items() if k != "t_ms"} != {k: v for k, v in y.items() if k != "t_ms"}:
+            return i, x, y
+    if len(a) != len(b):
+        i = min(len(a), len(b))
+        return i, a[i] if i < len(a) else None, b[i] if i < len(b) else None
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the timer logic")
+    parser.add_argument("log", help="session log (.rlog or exported .jsonl)")
+    parser.add_argument("--settings", help="settings.json the session ran with")
+    parser.add_argument("--tail", type=float, default=0.0, help="seconds to keep running after the last input")
+    parser.add_argument("--speed", type=float, help="pace the replay at this multiple of real time (e.g. 1000)")
+    parser.add_argument("--output", help="write the cue timeline as JSON Lines")
+    parser.add_argument("--against", metavar="CHECKOUT", help="also replay with timer_engine.py from this folder and diff")
+    args = parser.parse_args()
+
+    settings_data = None
+    if args.settings:
+        from settings_store import read_settings_file
+        settings_data = read_settings_file(args.settings)
+    inputs = read_inputs(args.log)
+    if not inputs:
+        print("No inputs in log")
+        return 1
+    until_ns = inputs[-1][0] + int(args.tail * NS_PER_SEC)
+
+    t0 = time.perf_counter()
+    timeline = replay(inputs, settings_data, until_ns=until_ns, speed=args.speed)
+    elapsed = time.perf_counter() - t0
+    span = (until_ns - inputs[0][0]) / NS_PER_SEC
+    print(f"{len(inputs)} inputs, {len(timeline)} cues over {span:.1f} s replayed in {elapsed * 1000:.1f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for entry in timeline:
+                f.write(json.dumps(entry) + "\n")
+    if args.against:
+        other = replay(inputs, settings_data, load_engine_module(args.against), until_ns=until_ns)
+        diff = compare_timelines(timeline, other)
+        if diff is None:
+            print(f"Identical cue timelines ({len(timeline)} cues)")
+        else:
+            index, ours, theirs = diff
+            print(f"Timelines differ at cue {index}:\n  this tree: {ours}\n  {args.against}: {theirs}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
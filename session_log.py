@@ -0,0 +1,203 @@
+import os
+import sys
+import csv
+import json
+import time
+import struct
+import threading
+
+# Binary session log: fixed 32-byte records in an append-only file.
+#
+#   header  b"RUBELOG1" + uint32 record size
+#   record  kind u8, code u8, reserved u16, loop_count i32, t_ns i64, a_ns i64, b_ns i64
+#
+# t_ns is time.monotonic_ns() when the record was made. a_ns / b_ns depend on
+# the kind (see FIELDS); code is the mode for START/CircleC and the sound for CUE.
+MAGIC = b"RUBELOG1"
+RECORD = struct.Struct("<BBHiqqq")
+HEADER = struct.Struct("<8sI")
+
+# Records held in memory between flushes; older unflushed ones are overwritten
+RING_RECORDS = 4096
+FLUSH_INTERVAL_S = 1.0
+
+EV_START = 1
+EV_CIRCLEC = 2
+EV_STOP = 3
+EV_LOOP = 4
+EV_CUE = 5
+EV_NUDGE = 6
+EV_HOTKEY = 7
+EV_PRESET = 8
+
+EVENT_NAMES = {
+    EV_START: "start",
+    EV_CIRCLEC: "circlec",
+    EV_STOP: "stop",
+    EV_LOOP: "loop",
+    EV_CUE: "cue",
+    EV_NUDGE: "nudge",
+    EV_HOTKEY: "hotkey",
+    EV_PRESET: "preset",
+}
+
+# What a_ns / b_ns hold for each kind, used by the exporters
+FIELDS = {
+    EV_START: ("start_ns", "preset_index"),
+    EV_CIRCLEC: ("start_ns", "preset_index"),
+    EV_STOP: ("", ""),
+    EV_LOOP: ("scheduled_ns", ""),
+    EV_CUE: ("scheduled_ns", "late_ns"),
+    EV_NUDGE: ("shift_ns", "remaining_ns"),
+    EV_HOTKEY: ("pressed_ns", "delay_ns"),
+    EV_PRESET: ("", "preset_index"),
+}
+
+# Sound keys as one byte; 0 = none / unknown
+SOUND_CODES = ("", "warning_5s_red", "warning_5s_yellow", "warning_5s_circlec", "warning_5s_slow",
+               "warning_5s_fast", "warning_5s_rainbow", "count_321", "end_0s")
+_SOUND_INDEX = {name: i for i, name in enumerate(SOUND_CODES)}
+
+
+def sound_code(key):
+    return _SOUND_INDEX.get(key or "", 0)
+
+
+class SessionLog:
+    # log() packs one record into a preallocated ring and returns; a background
+    # thread appends the new records to the file in batches. Nothing on the
+    # calling (GUI) thread allocates, formats or touches the disk.
+
+    def __init__(self, path, capacity=RING_RECORDS, flush_interval=FLUSH_INTERVAL_S):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.written = 0  # records appended to the file
+        self.dropped = 0  # records overwritten before they could be flushed
+        self._ring = bytearray(capacity * RECORD.size)
+        self._head = 0  # total records ever logged
+        self._tail = 0  # total records taken by the flusher
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="SessionLog", daemon=True)
+        self._thread.start()
+
+    def log(self, kind, loop_count=0, a_ns=0, b_ns=0, code=0, t_ns=None):
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        with self._lock:
+            RECORD.pack_into(self._ring, (self._head % self.capacity) * RECORD.size,
+                             kind, code, 0, loop_count, t_ns, a_ns, b_ns)
+            self._head += 1
+            if self._head - self._tail > self.capacity:
+                self.dropped += self._head - self._tail - self.capacity
+                self._tail = self._head - self.capacity
+            if self._head - self._tail > self.capacity // 2:
+                self._wake.set()
+
+    def flush(self):
+        # Copies pending records out of the ring and appends them (flusher thread / close)
+        with self._lock:
+            start, end = self._tail, self._head
+            self._tail = end
+            first = start % self.capacity
+            count = end - start
+            if first + count <= self.capacity:
+                chunk = bytes(self._ring[first * RECORD.size:(first + count) * RECORD.size])
+            else:
+                chunk = bytes(self._ring[first * RECORD.size:]) + \
+                    bytes(self._ring[:(first + count - self.capacity) * RECORD.size])
+        if not chunk:
+            return 0
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(HEADER.pack(MAGIC, RECORD.size))
+        self._file.write(chunk)
+        self._file.flush()
+        self.written += count
+        return count
+
+    def close(self):
+        self._stop = True
+        self._wake.set()
+        self._thread.join(5.0)
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"Failed to write session log: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop:
+                return
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Failed to write session log: {e}")
+
+
+class NullSessionLog:
+    # Stand-in when logging is switched off (RUBE_TIMER_LOG=0)
+
+    def log(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+# --- Reading and export (streaming: one record in memory at a time) ---
+
+def read_records(path):
+    # Yields dicts; a torn last record from a crash is ignored
+    with open(path, "rb") as f:
+        magic, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        while True:
+            raw = f.read(size)
+            if len(raw) < RECORD.size:
+                return
+            kind, code, _, loop_count, t_ns, a_ns, b_ns = RECORD.unpack_from(raw)
+            record = {"event": EVENT_NAMES.get(kind, str(kind)), "t_ns": t_ns, "loop_count": loop_count}
+            if kind == EV_CUE:
+                record["sound"] = SOUND_CODES[code] if code < len(SOUND_CODES) else str(code)
+            elif kind in (EV_START, EV_CIRCLEC):
+                record["mode"] = "circlec" if code else "normal"
+            for name, value in zip(FIELDS.get(kind, ("a_ns", "b_ns")), (a_ns, b_ns)):
+                if name:
+                    record[name] = value
+            yield record
+
+
+EXPORT_COLUMNS = ("event", "t_ns", "loop_count", "mode", "sound", "start_ns", "preset_index",
+                  "scheduled_ns", "late_ns", "shift_ns", "remaining_ns", "pressed_ns", "delay_ns")
+
+
+def export_csv(path, out):
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for record in read_records(path):
+        writer.writerow(record)
+
+
+def export_jsonl(path, out):
+    for record in read_records(path):
+        out.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    # python session_log.py LOG [csv|jsonl]  -> stdout
+    if len(sys.argv) < 2:
+        sys.exit("usage: session_log.py LOG [csv|jsonl]")
+    fmt = sys.argv[2] if len(sys.argv) > 2 else "csv"
+    (export_jsonl if fmt == "jsonl" else export_csv)(sys.argv[1], sys.stdout)
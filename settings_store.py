@@ -0,0 +1,222 @@
+import os
+import copy
+import json
+import tempfile
+import threading
+import time
+
+# Changes arriving closer together than this are written as one file
+DEBOUNCE_MS = 300
+
+# Sound key -> default path, relative to the external dir
+DEFAULT_AUDIO_SETTINGS = {
+    "warning_5s_red": "sounds/warning_5s_red.wav",
+    "warning_5s_yellow": "sounds/warning_5s_yellow.wav",
+    "warning_5s_circlec": "sounds/warning_5s_circleC.wav",
+    "warning_5s_slow": "sounds/warning_5s_slow.wav",
+    "warning_5s_fast": "sounds/warning_5s_fast.wav",
+    "warning_5s_rainbow": "sounds/warning_5s_rainbow.wav",
+    "count_321": "sounds/count.wav",
+    "end_0s": "sounds/end.wav"
+}
+
+
+def read_settings_file(path):
+    # Parsed settings.json, or None if it is missing or unreadable
+    if not os.path.exists(path):
+        return None
+    try:
+        # Try loading as UTF-8 first
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except UnicodeDecodeError:
+        try:
+            # Fallback to CP932 (Japanese Windows default) if UTF-8 fails
+            with open(path, 'r', encoding='cp932') as f:
+                return json.load(f)
+        except Exception:
+            print("Failed to decode settings.json with UTF-8 or CP932")
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"settings.json missing or invalid! {e}")
+    except Exception as e:
+        print(f"Unexpected error loading settings: {e}")
+    return None
+
+
+def migrate_label3_phases(presets, data):
+    # Label 3 (the third preset) used to alternate between two loop times kept
+    # in top-level label3_start_phases / label3_circled_phases. Gives it the
+    # equivalent phase program if it has none yet; returns presets.
+    if len(presets) > 2 and 'phases' not in presets[2]:
+        start = data.get('label3_start_phases', [23.75, 23.50])
+        circled = data.get('label3_circled_phases', [23.50, 21.00])
+        # Phase names are translation keys in main.py, or shown as written
+        presets[2]['phases'] = {
+            "start": {"cycle": [
+                {"name": "start_yellow", "time": float(start[0]), "warning": "yellow", "sound": "warning_5s_yellow"},
+                {"name": "start_rainbow", "time": float(start[1]), "warning": "red", "sound": "warning_5s_red"},
+            ]},
+            "circlec": {"cycle": [
+                {"name": "circlec_slow", "time": float(circled[0]), "warning": "yellow", "sound": "warning_5s_slow"},
+                {"name": "circlec_fast", "time": float(circled[1]), "warning": "red", "sound": "warning_5s_fast"},
+            ]},
+        }
+    return presets
+
+
+def normalize_settings(data):
+    # settings.json contents -> the fields the app saves, with old key names
+    # migrated and defaults filled in
+    presets = data.get('presets', [])
+    # Upgrade presets to have 'first_time' if missing, or enforce 5.00 if user requests
+    for p in presets:
+        # To satisfy user request, we enforce 5.00 if it was the old default of 6.00
+        if 'first_time' not in p or p['first_time'] == 6.00:
+            p['first_time'] = 5.00
+    migrate_label3_phases(presets, data)
+    return {
+        "start_hotkey": data.get('start_hotkey', 'f9'),
+        # Handle migration from disaster_hotkey/circled_hotkey to circlec_hotkey
+        "circlec_hotkey": data.get('circlec_hotkey', data.get('disaster_hotkey', data.get('circled_hotkey', 'f8'))),
+        "circlec_loop_time": float(data.get('circlec_loop_time', data.get('circled_loop_time', 19.15))),
+        "circlec_first_time": float(data.get('circlec_first_time', data.get('circled_first_time', 5.00))),
+        # Individual hotkey flags
+        "start_hotkey_enabled": data.get('start_hotkey_enabled', data.get('hotkey_enabled', True)),
+        "circlec_hotkey_enabled": data.get('circlec_hotkey_enabled', data.get('circled_hotkey_enabled', data.get('hotkey_enabled', True))),
+        "language": data.get('language', 'en'),
+        "presets": presets,
+        "audio": data.get('audio', {}),
+        # Measured output latency per audio device name (ms), see latency_calibration.py
+        "audio_latency_ms": data.get('audio_latency_ms', {}),
+        # Mix each loop's warning-to-end cues into one track (CueMixer.premix)
+        "premixed_cues": bool(data.get('premixed_cues', False)),
+        # Localhost control/telemetry API port (control_server.py); 0 = off
+        "control_port": int(data.get('control_port', 0)),
+    }
+
+
+def diff_settings(old, new):
+    # {field: detail} for every field of `new` that differs from `old`.
+    # detail is the set of changed indices for presets, the set of changed
+    # sound keys for audio, and True for plain values.
+    changes = {}
+    for field, value in new.items():
+        before = old.get(field)
+        if value == before:
+            continue
+        if field == "presets" and isinstance(before, list) and len(before) == len(value):
+            changes[field] = {i for i, (a, b) in enumerate(zip(before, value)) if a != b}
+        elif field == "audio" and isinstance(before, dict):
+            changes[field] = {key for key in set(before) | set(value) if before.get(key) != value.get(key)}
+        else:
+            changes[field] = True
+    return changes
+
+
+def write_json_atomic(path, data):
+    # Write to a temp file next to `path`, fsync it and rename it over the old
+    # file, so a crash leaves either the previous or the new settings, never half
+    folder = os.path.dirname(os.path.abspath(path))
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private; keep the permissions of the file it replaces
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (POSIX; Windows has no directory handles)
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+class SettingsWriter:
+    # Background writer for settings.json. save() only snapshots the data and
+    # returns; a worker thread waits for DEBOUNCE_MS of quiet, then serialises
+    # the newest snapshot and writes it atomically. Older snapshots are dropped.
+
+    def __init__(self, path, debounce_ms=DEBOUNCE_MS):
+        self.path = path
+        self.debounce_ms = debounce_ms
+        self.writes = 0
+        self.last_error = None
+        self._pending = None
+        self._due = 0.0
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="SettingsWriter", daemon=True)
+        self._thread.start()
+
+    def save(self, data):
+        # Deep copy on the caller's thread: the GUI keeps mutating its lists
+        snapshot = copy.deepcopy(data)
+        with self._cond:
+            self._pending = snapshot
+            self._due = time.monotonic() + self.debounce_ms / 1000
+            self._cond.notify()
+
+    def flush(self, timeout=5.0):
+        # Write anything pending now and wait for it (used on exit)
+        end = time.monotonic() + timeout
+        with self._cond:
+            self._due = 0.0
+            self._cond.notify()
+            while (self._pending is not None or self._busy) and time.monotonic() < end:
+                self._cond.wait(end - time.monotonic())
+            return self._pending is None and not self._busy
+
+    def close(self, timeout=5.0):
+        done = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        return done
+
+    @property
+    def busy(self):
+        # A save is waiting or being written; the file on disk is about to change
+        with self._cond:
+            return self._pending is not None or self._busy
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._pending is None or time.monotonic() < self._due):
+                    if self._pending is None:
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(max(0.0, self._due - time.monotonic()))
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+                self._busy = True
+            try:
+                write_json_atomic(self.path, data)
+                self.writes += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"Error saving settings: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,179 @@
+import os
+import sys
+import mmap
+import time
+import struct
+import tempfile
+
+from session_log import SOUND_CODES, sound_code
+
+# Countdown state in a small memory-mapped file, for overlays and second
+# displays in other processes. The app rewrites it whenever the state changes;
+# readers poll it at whatever rate they like and never talk to the GUI process.
+#
+#   header   magic b"RUBESTAT", version u32, seq u32
+#   payload  running u8, mode u8, warning u8, phase u8, preset_index i32,
+#            loop_count i32, writer pid i32, time_left_ns i64, end_ns i64,
+#            loop_length_ns i64, published_ns i64
+#
+# seq is a seqlock: odd while the writer is in the middle of an update. A
+# reader copies the payload and retries if seq was odd or changed meanwhile.
+# end_ns is time.monotonic_ns() at the loop end (0 when stopped), so readers
+# derive a live time_left from their own monotonic clock between updates.
+# writer pid is 0 once the app has closed. A writer that died in the middle
+# of an update leaves seq odd; readers give up after STALE_READ_S and
+# report their last state as stale.
+MAGIC = b"RUBESTAT"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+PAYLOAD = struct.Struct("<BBBBiiiqqqq")
+SEQ = struct.Struct("<I")
+SEQ_OFFSET = 12
+SIZE = 64
+# A write takes well under a microsecond; a seq that stays odd this long
+# means the writer stopped mid-update
+STALE_READ_S = 0.05
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "rube_timer_state.bin")
+
+MODES = ("normal", "circlec")
+WARNINGS = ("none", "red", "yellow")
+
+
+class StateWriter:
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, SIZE)
+            self._map = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        self._seq = 0
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0)
+        self._pid = os.getpid()
+
+    def write(self, state):
+        # state: CountdownEngine.snapshot()
+        self._write(
+            1 if state["running"] else 0,
+            MODES.index(state["mode"]) if state["mode"] in MODES else 255,
+            WARNINGS.index(state["warning"]) if state["warning"] in WARNINGS else 255,
+            sound_code(state["phase"]),
+            state["preset_index"],
+            state["loop_count"],
+            self._pid,
+            int(state["time_left"] * 1_000_000_000),
+            state["end_ns"] or 0,
+            int(state["loop_length"] * 1_000_000_000),
+            time.monotonic_ns(),
+        )
+
+    def close(self):
+        # Readers see the app as gone (pid 0) rather than a frozen countdown
+        if self._map is None:
+            return
+        values = list(PAYLOAD.unpack_from(self._map, HEADER.size))
+        values[6] = 0
+        self._write(*values)
+        self._map.close()
+        self._map = None
+
+    def _write(self, *values):
+        buf = self._map
+        self._seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self._seq)
+        PAYLOAD.pack_into(buf, HEADER.size, *values)
+        self._seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self._seq)
+
+
+class StateReader:
+    # Read-only view; cheap enough to call from a render loop every frame
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._map = None
+        self.retries = 0  # reads that raced a write and were repeated
+        self._last = None
+
+    def read(self, now_ns=None):
+        # Latest state as a dict (time_left is live), or None if no app has
+        # published yet. "stale" is set when the writer is stuck mid-update:
+        # the last good state is returned instead, marked not alive.
+        buf = self._map
+        if buf is None:
+            try:
+                with open(self.path, "rb") as f:
+                    buf = self._map = mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            magic, version, _ = HEADER.unpack_from(buf, 0)
+            if magic != MAGIC or version != VERSION:
+                buf.close()
+                self._map = None
+                raise ValueError(f"{self.path} is not a version {VERSION} state file")
+        attempts = 0
+        give_up = None
+        while True:
+            before = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if not before & 1:
+                values = PAYLOAD.unpack_from(buf, HEADER.size)
+                if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == before:
+                    break
+            self.retries += 1
+            attempts += 1
+            if attempts % 1000 == 0:
+                # The clock is only read once retries pile up
+                now = time.monotonic()
+                if give_up is None:
+                    give_up = now + STALE_READ_S
+                elif now >= give_up:
+                    if self._last is None:
+                        return None
+                    return dict(self._last, stale=True, alive=False)
+        if before == 0:
+            return None
+        running, mode, warning, phase, preset_index, loop_count, pid, time_left_ns, end_ns, \
+            loop_length_ns, published_ns = values
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        if running and end_ns:
+            time_left_ns = max(0, end_ns - now_ns)
+        self._last = {
+            "running": bool(running),
+            "mode": MODES[mode] if mode < len(MODES) else str(mode),
+            "warning": WARNINGS[warning] if warning < len(WARNINGS) else str(warning),
+            "phase": SOUND_CODES[phase] if phase < len(SOUND_CODES) else str(phase),
+            "preset_index": preset_index,
+            "loop_count": loop_count,
+            "time_left": time_left_ns / 1e9,
+            "end_ns": end_ns or None,
+            "loop_length": loop_length_ns / 1e9,
+            "published_ns": published_ns,
+            "alive": pid != 0,
+            "stale": False,
+        }
+        return self._last
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+if __name__ == "__main__":
+    # python shared_state.py [HZ]  -> print the state from another process
+    reader = StateReader()
+    interval = 1.0 / float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+    while True:
+        state = reader.read()
+        if state is None:
+            print("waiting for the timer...", end="\r")
+        elif state["stale"]:
+            print("timer stopped mid-update", end="\r")
+        else:
+            print("{time_left:6.2f}  loop {loop_count:<4} {mode:<8} {warning:<7} {phase:<20}".format(**state),
+                  end="\r")
+        time.sleep(interval)
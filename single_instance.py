@@ -0,0 +1,118 @@
+import os
+import socket
+import threading
+
+# Single-instance guard. The first copy of the app owns a localhost TCP port;
+# a second launch connects to it, sends its command line and exits without
+# loading Qt. Only socket/os/threading are imported here so that path stays short.
+#
+#   main.py --start | --circlec | --stop | --preset N     (N as on the buttons, from 1)
+#
+# Protocol: the client sends one "action [value]" line per command, closes
+# its sending side and waits for "ok\n" (sent once the commands are queued).
+
+INSTANCE_PORT = int(os.environ.get("RUBE_TIMER_INSTANCE_PORT", "47913"))
+CONNECT_TIMEOUT_S = 1.0
+
+FLAGS = {"--start": "start", "--circlec": "circlec", "--stop": "stop"}
+USAGE = "usage: main.py [--headless] [--start | --circlec | --stop | --preset N] ..."
+
+
+def parse_args(argv):
+    # [(action, value)] in command-line order; ValueError with the usage text
+    commands = []
+    args = iter(argv)
+    for arg in args:
+        if arg in FLAGS:
+            commands.append((FLAGS[arg], None))
+        elif arg == "--preset":
+            try:
+                number = int(next(args))
+            except (StopIteration, ValueError):
+                raise ValueError(USAGE)
+            if number < 1:
+                raise ValueError(USAGE)
+            commands.append(("preset", number - 1))
+        else:
+            raise ValueError(USAGE)
+    return commands
+
+
+def claim(port=INSTANCE_PORT):
+    # The listening socket if this is the first instance, otherwise None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+        # Windows: without this a second process could bind the same port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+    else:
+        # POSIX: still one listener per port, but a restart is not blocked by TIME_WAIT
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind(("127.0.0.1", port))
+        sock.listen(4)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def forward(commands, port=INSTANCE_PORT):
+    # Sends the commands to the running instance; True once it acknowledged.
+    # An empty list just asks it to come to the front.
+    message = "".join(f"{action} {'' if value is None else value}\n"
+                      for action, value in commands or [("show", None)])
+    try:
+        with socket.create_connection(("127.0.0.1", port), CONNECT_TIMEOUT_S) as sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(message.encode("ascii"))
+            sock.shutdown(socket.SHUT_WR)
+            return sock.recv(16) == b"ok\n"
+    except OSError:
+        return False
+
+
+class InstanceListener:
+    # Accepts forwarded launches on the claimed socket (daemon thread) and
+    # calls on_command(action, value) for each command, in order
+
+    def __init__(self, sock, on_command):
+        self.sock = sock
+        self.on_command = on_command
+        self._thread = threading.Thread(target=self._run, name="InstanceListener", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # wakes accept() on Linux
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return  # closed by stop()
+            with conn:
+                try:
+                    conn.settimeout(CONNECT_TIMEOUT_S)
+                    data = b""
+                    while True:
+                        chunk = conn.recv(1024)
+                        if not chunk:
+                            break
+                        data += chunk
+                    for line in data.decode("ascii", "replace").splitlines():
+                        action, _, value = line.strip().partition(" ")
+                        if action == "preset":
+                            self.on_command(action, int(value))
+                        elif action in ("start", "circlec", "stop", "show"):
+                            self.on_command(action, None)
+                    conn.sendall(b"ok\n")
+                    # Let the client close first, so TIME_WAIT stays on its side
+                    conn.recv(1)
+                except (OSError, ValueError):
+                    pass
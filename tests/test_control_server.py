@@ -0,0 +1,73 @@
+import json
+import socket
+import http.client
+
+import pytest
+
+from control_server import MAX_NUDGE_S, ControlServer
+
+
+@pytest.fixture
+def server():
+    received = []
+    server = ControlServer(lambda action, value: received.append((action, value)), port=0)
+    assert server.start(), server.error
+    server.received = received
+    yield server
+    server.stop()
+
+
+def request(server, method, path, headers=None):
+    conn = http.client.HTTPConnection(server.host, server.port, timeout=2)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def test_commands_reach_the_handler(server):
+    assert request(server, "POST", "/preset/1")[0] == 202
+    assert request(server, "POST", "/nudge?seconds=-0.25")[0] == 202
+    assert request(server, "POST", "/start")[0] == 202
+    assert request(server, "POST", "/nudge")[0] == 400
+    assert request(server, "GET", "/start")[0] == 405
+    assert server.received == [("preset", 1), ("nudge", -0.25), ("start", None)]
+
+
+def test_nudge_rejects_non_finite_and_clamps(server):
+    for bad in ("nan", "inf", "-inf", "x"):
+        assert request(server, "POST", "/nudge?seconds=" + bad)[0] == 400, bad
+    assert request(server, "POST", "/nudge?seconds=1e300")[0] == 202
+    assert request(server, "POST", "/nudge?seconds=-1e300")[0] == 202
+    assert server.received == [("nudge", MAX_NUDGE_S), ("nudge", -MAX_NUDGE_S)]
+
+
+def test_other_sites_and_rebound_hostnames_are_refused(server):
+    assert request(server, "POST", "/start", {"Origin": "https://evil.example"})[0] == 403
+    assert request(server, "POST", "/start", {"Origin": "null"})[0] == 403
+    assert request(server, "POST", "/start", {"Host": "evil.example:%d" % server.port})[0] == 403
+    assert request(server, "GET", "/state", {"Host": "evil.example"})[0] == 403
+    assert request(server, "POST", "/stop", {"Origin": "http://localhost:5500"})[0] == 202
+    assert server.received == [("stop", None)]
+
+
+def test_subscribers_get_each_change_once(server):
+    stream = socket.create_connection((server.host, server.port))
+    stream_file = stream.makefile("rb")
+    try:
+        stream.sendall(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        while stream_file.readline() != b"\r\n":
+            pass
+
+        def next_event():
+            line = stream_file.readline()
+            stream_file.readline()
+            return json.loads(line[len(b"data: "):])
+
+        assert next_event() == {}
+        for i in range(50):
+            server.publish({"loop_count": i})
+            assert next_event() == {"loop_count": i}
+    finally:
+        stream_file.close()
+        stream.close()
+    assert json.loads(request(server, "GET", "/state")[1]) == {"loop_count": 49}
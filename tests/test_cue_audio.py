@@ -0,0 +1,102 @@
+from array import array
+
+import pytest
+
+from cue_audio import CueMixer
+from timer_engine import CountdownEngine, SimulatedClock, TimerSettings
+
+SECOND = 1_000_000_000
+
+
+def render_loop(premix, late_ns, buffers):
+    # A warning due late_ns ago (negative: ahead) and its loop tail, rendered
+    # in 10 ms blocks against a fake clock
+    now = [10 ** 12]
+    mixer = CueMixer(clock=lambda: now[0])
+    for key, samples in buffers.items():
+        mixer.add_buffer(key, array('h', samples))
+    mixer.set_premix(premix)
+    mixer.render(441)  # anchor
+    t0 = now[0] - late_ns
+    mixer.schedule([(t0, "warning_5s_red"), (t0 + 2 * SECOND, "count_321"), (t0 + 3 * SECOND, "count_321"),
+                    (t0 + 4 * SECOND, "count_321"), (t0 + 5 * SECOND, "end_0s")])
+    out = array('h')
+    for _ in range(600):
+        out.frombytes(mixer.render(441))
+        now[0] += 10_000_000
+    return mixer, out, t0
+
+
+def test_premixed_tail_sounds_like_individual_cues():
+    buffers = {"warning_5s_red": [1000, -500] * 2205, "count_321": [2000, 10] * 220, "end_0s": [3000, 7] * 220}
+    _, individual, _ = render_loop(False, -50_000_000, buffers)
+    mixer, premixed, _ = render_loop(True, -50_000_000, buffers)
+    assert mixer._tails
+    assert premixed == individual
+
+
+@pytest.mark.parametrize("premix", (False, True))
+def test_late_tail_keeps_its_beeps_on_their_due_frames(premix):
+    # Scheduled 60 ms late: the end beep still starts on its own due frame
+    buffers = {"warning_5s_red": [1000] * 4410, "count_321": [2000] * 441, "end_0s": [3000] * 441}
+    mixer, out, t0 = render_loop(premix, 60_000_000, buffers)
+    end_level = int(3000 * mixer.volume)
+    # out starts after the 441-frame anchor block
+    assert next(i for i, v in enumerate(out) if v == end_level) == mixer.frame_at(t0 + 5 * SECOND) - 441
+
+
+def test_clear_schedule_drops_cues_waiting_for_their_sound():
+    now = [10 ** 12]
+    mixer = CueMixer(clock=lambda: now[0])
+    assert not mixer.trigger("count_321")
+    mixer.clear_schedule()
+    mixer.add_buffer("count_321", array('h', [2000] * 441))
+    assert not any(mixer.render(441))
+
+
+def test_sound_reloaded_under_a_scheduled_tail_still_plays_the_loop():
+    now = [10 ** 12]
+    mixer = CueMixer(clock=lambda: now[0])
+    mixer.add_buffer("warning_5s_red", array('h', [1000] * 441))
+    mixer.add_buffer("count_321", array('h', [2000] * 441))
+    mixer.add_buffer("end_0s", array('h', [3000] * 441))
+    mixer.set_premix(True)
+    mixer.render(441)  # anchor
+    t0 = now[0] + SECOND
+    mixer.schedule([(t0, "warning_5s_red"), (t0 + 2 * SECOND, "count_321"), (t0 + 3 * SECOND, "count_321"),
+                    (t0 + 4 * SECOND, "count_321"), (t0 + 5 * SECOND, "end_0s")])
+    assert mixer._tails
+    mixer.add_buffer("count_321", array('h', [2500] * 441))  # hot reload drops the mix
+    out = array('h')
+    for _ in range(700):
+        out.frombytes(mixer.render(441))
+        now[0] += 10_000_000
+    for offset, level in ((0, 1000), (2, 2500), (3, 2500), (4, 2500), (5, 3000)):
+        assert out[mixer.frame_at(t0 + offset * SECOND) - 441] == int(level * mixer.volume), offset
+    assert not mixer._pending
+
+
+@pytest.mark.parametrize("premix", (False, True))
+@pytest.mark.parametrize("first_time", (3.0, 4.5))
+def test_short_first_loop_starts_with_its_warning(premix, first_time):
+    # A first loop shorter than the 5 s warning plays the warning at once
+    settings = TimerSettings()
+    settings.presets[0]['first_time'] = first_time
+    clock = SimulatedClock(10 ** 12)
+    mixer = CueMixer(clock=clock)
+    mixer.add_buffer("warning_5s_red", array('h', [1000] * 4410))
+    mixer.add_buffer("count_321", array('h', [2000] * 441))
+    mixer.add_buffer("end_0s", array('h', [3000] * 441))
+    mixer.set_premix(premix)
+    mixer.render(441)  # anchor
+    engine = CountdownEngine(settings, clock)
+    engine.select_preset(0)
+    engine.start()
+    mixer.schedule(engine.upcoming_cues())
+    out = array('h')
+    for _ in range(int(first_time * 100) + 50):
+        out.frombytes(mixer.render(441))
+        clock.advance(0.01)
+    # Started now, it is two 10 ms blocks late; a premixed tail skips those frames
+    assert all(out[:4410 - 2 * 441])
+    assert out[mixer.frame_at(engine.deadline.end_ns) - 441] == int(3000 * mixer.volume)
@@ -0,0 +1,25 @@
+import time
+
+from cue_audio import CueMixer, NullSink
+from latency_calibration import CLICK_KEY, LatencyCalibration
+
+
+def run(calibration):
+    time.sleep(calibration.begin() / 1000)
+    return calibration.finish()
+
+
+def test_measures_the_offline_sink_delay_and_the_offset_cancels_it():
+    mixer = CueMixer()
+    mixer.set_volume(1.0)
+    sink = NullSink(mixer, device_latency_ms=37)
+    sink.start()
+    try:
+        measured = run(LatencyCalibration(mixer, sink))
+        assert measured is not None and abs(measured - 37) < 3
+        mixer.set_device_latency_ms(measured)
+        residual = run(LatencyCalibration(mixer, sink, keep_offset=True))
+    finally:
+        sink.stop()
+    assert abs(residual) < 3
+    assert CLICK_KEY not in mixer.buffers and mixer.device_latency_ns == int(measured * 1_000_000)
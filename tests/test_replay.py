@@ -0,0 +1,28 @@
+from replay import compare_timelines, replay
+from timer_engine import NS_PER_SEC, CountdownEngine, SimulatedClock, TimerSettings
+
+SECOND = NS_PER_SEC
+INPUTS = [(0, "preset", 2), (1 * SECOND, "start", None), (70 * SECOND + 3_000_000, "nudge", -0.5),
+          (200 * SECOND, "circlec", None), (260 * SECOND, "stop", None), (261 * SECOND, "preset", 0),
+          (262 * SECOND, "start", None)]
+
+
+def test_replay_matches_a_ticked_engine_fed_the_same_inputs():
+    until_ns = 400 * SECOND
+    timeline = replay(INPUTS, until_ns=until_ns)
+
+    clock = SimulatedClock()
+    engine = CountdownEngine(TimerSettings(), clock)
+    engine.select_preset(0)
+    ticked = []
+    pending = list(INPUTS)
+    while clock.now_ns <= until_ns:
+        while pending and pending[0][0] <= clock.now_ns:
+            t_ns, action, value = pending.pop(0)
+            {"preset": lambda: engine.select_preset(value), "start": lambda: engine.start(t_ns),
+             "circlec": lambda: engine.start_circlec(t_ns), "stop": engine.stop,
+             "nudge": lambda: engine.nudge(value)}[action]()
+        ticked += [(e.kind, e.sound, e.scheduled_ns / 1e6) for e in engine.update()]
+        clock.advance(0.01)
+    assert [(e["kind"], e["sound"], e["t_ms"]) for e in timeline] == ticked
+    assert compare_timelines(timeline, timeline) is None
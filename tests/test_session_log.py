@@ -0,0 +1,25 @@
+import io
+import time
+
+from session_log import EV_CUE, EV_START, EV_STOP, SessionLog, export_csv, read_records, sound_code
+
+
+def test_ring_wraps_and_exports(tmp_path):
+    path = str(tmp_path / "session.rlog")
+    log = SessionLog(path, capacity=64, flush_interval=0.01)
+    log.log(EV_START, 1, a_ns=123, b_ns=2)
+    for i in range(1000):
+        log.log(EV_CUE, 1, a_ns=i, b_ns=50_000, code=sound_code("count_321"))
+        if i % 20 == 0:
+            time.sleep(0.002)  # let the flusher drain some batches before the ring overflows
+    log.log(EV_STOP)
+    log.close()
+
+    records = list(read_records(path))
+    assert records[0]["event"] == "start" and records[0]["start_ns"] == 123
+    assert records[-1]["event"] == "stop"
+    assert len(records) + log.dropped == 1002
+    assert all(r["sound"] == "count_321" for r in records if r["event"] == "cue")
+    out = io.StringIO()
+    export_csv(path, out)
+    assert out.getvalue().count("\n") == len(records) + 1
@@ -0,0 +1,43 @@
+import copy
+import json
+import os
+import time
+
+from settings_store import SettingsWriter, diff_settings, normalize_settings
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_burst_of_saves_is_one_complete_write(tmp_path):
+    path = str(tmp_path / "settings.json")
+    writer = SettingsWriter(path, debounce_ms=50)
+    for i in range(100):
+        writer.save({"presets": [{"label": str(i), "time": 20.0}]})
+    time.sleep(0.3)
+    assert load(path)["presets"][0]["label"] == "99"
+    assert writer.writes == 1
+
+    writer.save({"language": "en"})
+    assert writer.close()
+    assert load(path) == {"language": "en"}
+    assert writer.writes == 2
+    assert sorted(os.listdir(tmp_path)) == ["settings.json"]
+
+
+def test_normalize_fills_defaults_and_migrates_hotkey():
+    old = normalize_settings({"presets": [{"label": "1", "time": 20.0}], "disaster_hotkey": "f7"})
+    assert old["circlec_hotkey"] == "f7" and old["presets"][0]["first_time"] == 5.0
+
+
+def test_diff_reports_only_changed_parts():
+    old = normalize_settings({"presets": [{"label": "1", "time": 20.0}, {"label": "2", "time": 17.75}],
+                              "audio": {"end_0s": "sounds/end.wav"}})
+    new = copy.deepcopy(old)
+    new["presets"][1]["time"] = 18.0
+    new["audio"]["count_321"] = "sounds/count.wav"
+    new["circlec_loop_time"] = 19.5
+    assert diff_settings(old, new) == {"presets": {1}, "audio": {"count_321"}, "circlec_loop_time": True}
+    assert diff_settings(new, new) == {}
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from shared_state import SEQ, SEQ_OFFSET, StateReader, StateWriter
+
+STATE = {"running": True, "mode": "circlec", "warning": "yellow", "phase": "warning_5s_slow",
+         "preset_index": 2, "loop_count": 0, "time_left": 5.0, "end_ns": 0, "loop_length": 21.0}
+
+
+@pytest.fixture
+def pair(tmp_path):
+    path = str(tmp_path / "state.bin")
+    writer = StateWriter(path)
+    yield writer, StateReader(path)
+    writer.close()
+
+
+def test_missing_file_reads_none(tmp_path):
+    assert StateReader(str(tmp_path / "state.bin")).read() is None
+
+
+def test_reader_racing_a_busy_writer_never_sees_a_torn_state(pair):
+    writer, reader = pair
+    state = dict(STATE)
+    stop = threading.Event()
+
+    def hammer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            # Every field derived from i, so a torn read shows as a mismatch
+            state.update(loop_count=i, end_ns=i * 1000, preset_index=i % 7)
+            writer.write(state)
+
+    writer.write(state)  # a reader before the first write gets None
+    thread = threading.Thread(target=hammer)
+    thread.start()
+    try:
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < 0.5:
+            s = reader.read(now_ns=0)
+            assert s["end_ns"] == s["loop_count"] * 1000 and s["preset_index"] == s["loop_count"] % 7, s
+    finally:
+        stop.set()
+        thread.join()
+    last = reader.read()
+    assert last["mode"] == "circlec" and last["phase"] == "warning_5s_slow" and last["alive"]
+    assert not last["stale"]
+
+
+def test_writer_dead_mid_update_reads_stale(pair):
+    writer, reader = pair
+    writer.write(dict(STATE, loop_count=7))
+    assert reader.read()["loop_count"] == 7
+    SEQ.pack_into(writer._map, SEQ_OFFSET, writer._seq + 1)
+    stuck = reader.read()
+    assert stuck["stale"] and not stuck["alive"] and stuck["loop_count"] == 7
+    SEQ.pack_into(writer._map, SEQ_OFFSET, writer._seq)
+    assert not reader.read()["stale"]
+
+
+def test_closed_writer_is_not_alive(tmp_path):
+    path = str(tmp_path / "state.bin")
+    writer = StateWriter(path)
+    writer.write(dict(STATE))
+    writer.close()
+    assert not StateReader(path).read()["alive"]
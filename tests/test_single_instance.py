@@ -0,0 +1,30 @@
+import pytest
+
+from single_instance import INSTANCE_PORT, InstanceListener, claim, forward, parse_args
+
+
+def test_parse_args():
+    assert parse_args(["--preset", "2", "--start"]) == [("preset", 1), ("start", None)]
+    for bad in (["--preset"], ["--preset", "0"], ["--go"]):
+        with pytest.raises(ValueError):
+            parse_args(bad)
+
+
+def test_port_is_exclusive_and_commands_arrive_in_order():
+    port = INSTANCE_PORT + 1
+    first = claim(port)
+    assert first is not None, f"port {port} is in use"
+    assert claim(port) is None
+    received = []
+    listener = InstanceListener(first, lambda action, value: received.append((action, value)))
+    listener.start()
+    try:
+        assert forward([("preset", 1), ("start", None)], port)
+        assert forward([], port)
+    finally:
+        listener.stop()
+    assert received == [("preset", 1), ("start", None), ("show", None)]
+    assert not forward([("stop", None)], port)
+    second = claim(port)
+    assert second is not None, "port not free after the listener closed"
+    second.close()
@@ -0,0 +1,99 @@
+import time
+
+from timer_engine import (CUE_LOOP, CUE_WARNING, MODE_CIRCLEC, MODE_NORMAL, NS_PER_SEC, CountdownEngine,
+                          LoopDeadline, SimulatedClock, TimerSettings, compile_program, seconds_to_ns,
+                          simulate_drift, simulate_schedule)
+
+
+def cue_list(events):
+    return [(e.kind, e.sound, e.scheduled_ns) for e in events]
+
+
+def test_no_drift_over_10000_loops():
+    # Boundaries must stay exactly on the ideal schedule
+    result = simulate_drift()
+    assert result["loops"] == 10_000
+    assert result["cumulative_error_ns"] == 0 and result["worst_error_ns"] == 0
+
+
+def test_drift_check_catches_a_deadline_carried_from_the_tick(monkeypatch):
+    # The old per-tick countdown: each loop restarts from the tick that saw it end
+    monkeypatch.setattr(LoopDeadline, "carry", lambda self, duration: self.start(duration))
+    result = simulate_drift(loops=100)
+    assert result["cumulative_error_ns"] > 0 and result["worst_error_ns"] > 0
+
+
+def test_jumped_schedule_matches_10ms_ticks():
+    # One hour of label 3 START and CircleC alternation
+    settings = TimerSettings()
+    for mode in (MODE_NORMAL, MODE_CIRCLEC):
+        jumped = simulate_schedule(settings, 2, mode, 3600)
+        ticked = simulate_schedule(settings, 2, mode, 3600, step=0.01)
+        assert any(e.kind == CUE_LOOP for e in jumped)
+        assert cue_list(jumped) == cue_list(ticked), mode
+
+
+def test_three_phase_program_cycles():
+    settings = TimerSettings()
+    settings.presets[0]['phases'] = {"start": {"first": {"time": 4.0}, "cycle": [
+        {"time": 10.0}, {"time": 12.0, "warning": "yellow", "sound": "warning_5s_yellow"}, {"time": 8.0}]}}
+    program = compile_program(settings, 0, MODE_NORMAL)
+    assert [p.time for p in program.phases] == [4.0, 10.0, 12.0, 8.0]
+    assert program.next_index == (1, 2, 3, 1)
+    warnings = [e.sound for e in simulate_schedule(settings, 0, MODE_NORMAL, 4 + 30 + 30) if e.kind == CUE_WARNING]
+    assert warnings == ["warning_5s_red"] + ["warning_5s_red", "warning_5s_yellow", "warning_5s_red"] * 2
+
+
+def custom_cue_engine():
+    # Own cue list: 10 s yellow, 5 s red, then a beep every second
+    settings = TimerSettings()
+    settings.presets[1]['cues'] = [{"at": s, "sound": "count_321"} for s in range(1, 10) if s != 5] + [
+        {"at": 10, "warning": "yellow", "sound": "warning_5s_yellow"}, {"at": 5, "warning": "red"}]
+    clock = SimulatedClock()
+    engine = CountdownEngine(settings, clock)
+    engine.select_preset(1)
+    engine.start()
+    clock.advance(5.0)
+    engine.update()  # first loop (5 s) done
+    return engine
+
+
+def test_custom_cue_list_fires_in_order():
+    engine = custom_cue_engine()
+    events = engine.advance(17.75 - 4.5)
+    assert [round((e.scheduled_ns - seconds_to_ns(5.0)) / NS_PER_SEC, 2) for e in events] == \
+        [7.75, 8.75, 9.75, 10.75, 11.75, 12.75]
+    assert events[0].visual == "yellow" and events[5].visual == "red" and engine.warning == "red"
+
+
+def test_nudge_rearms_cues_and_rolls_back_warning():
+    engine = custom_cue_engine()
+    engine.advance(17.75 - 4.5)
+    engine.nudge(4.0)  # 8.5 s left: the 5-8 s cues are ahead again, 9 and 10 s stay fired
+    assert engine._next_cue == 2 and engine.warning == "yellow"
+    assert [round(e.scheduled_ns / NS_PER_SEC, 2) for e in engine.advance(5.0)][:4] == [18.75, 19.75, 20.75, 21.75]
+
+
+def test_nudge_before_every_cue_clears_warning():
+    engine = custom_cue_engine()
+    engine.advance(17.75 - 4.5)
+    engine.nudge(10.0)
+    assert engine._next_cue == 0 and engine.warning == "none"
+
+
+def test_tick_cost_does_not_grow_with_cue_list():
+    def tick_cost(cues):
+        settings = TimerSettings()
+        settings.presets[1]['cues'] = cues
+        clock = SimulatedClock()
+        engine = CountdownEngine(settings, clock)
+        engine.select_preset(1)
+        engine.start()
+        t0 = time.perf_counter()
+        for _ in range(20_000):
+            engine.update(clock.now_ns)
+        return time.perf_counter() - t0
+
+    few = min(tick_cost(None) for _ in range(3))
+    many = min(tick_cost([{"at": i / 10} for i in range(1, 200)]) for _ in range(3))
+    assert many < few * 3
@@ -0,0 +1,60 @@
+import threading
+
+from timer_engine import MODE_CIRCLEC, SimulatedClock, TimerSettings, simulate_schedule
+from timer_scheduler import TimerScheduler
+
+
+def cooldown_settings():
+    settings = TimerSettings()
+    settings.presets = [{'label': 'cd', 'time': 45.0, 'first_time': 12.0}]
+    return settings
+
+
+def test_timers_driven_together_fire_what_each_fires_alone():
+    clock = SimulatedClock()
+    scheduler = TimerScheduler(clock)
+    floor = TimerSettings()
+    cooldown = cooldown_settings()
+    scheduler.add("label3", floor, preset_index=2)
+    scheduler.add("circlec", floor, preset_index=0)
+    scheduler.add("cooldown", cooldown)
+    scheduler.start("label3")
+    scheduler.start("circlec", MODE_CIRCLEC)
+    scheduler.start("cooldown")
+
+    events = {"label3": [], "circlec": [], "cooldown": []}
+    scheduler.add_listener(lambda name, event: events[name].append(event))
+    end_ns = clock.now_ns + 600 * 1_000_000_000
+    while scheduler.next_wake_ns() <= end_ns:
+        clock.now_ns = scheduler.next_wake_ns()
+        scheduler.run_due()
+
+    for name, settings, index, mode in (("label3", floor, 2, None), ("circlec", floor, 0, MODE_CIRCLEC),
+                                        ("cooldown", cooldown, 0, None)):
+        alone = simulate_schedule(settings, index, mode, 600)
+        assert [(e.kind, e.sound, e.scheduled_ns) for e in events[name]] == \
+            [(e.kind, e.sound, e.scheduled_ns) for e in alone], name
+        assert all(e.fired_ns == e.scheduled_ns for e in events[name] if e.kind != "loop"), name
+
+
+def test_commands_from_another_thread_while_run_drives_the_heap():
+    scheduler = TimerScheduler()
+    cooldown = cooldown_settings()
+    for i in range(20):
+        scheduler.add(i, cooldown)
+    stop = threading.Event()
+    driver = threading.Thread(target=scheduler.run, args=(stop,))
+    driver.start()
+    try:
+        for round_ in range(200):
+            for i in range(20):
+                if round_ % 3 == 0:
+                    scheduler.start(i)
+                elif round_ % 3 == 1:
+                    scheduler.nudge(i, -0.01)
+                else:
+                    scheduler.stop(i)
+    finally:
+        stop.set()
+        driver.join(5)
+    assert not driver.is_alive()
@@ -0,0 +1,460 @@
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+from settings_store import migrate_label3_phases
+
+NS_PER_SEC = 1_000_000_000
+
+MODE_NORMAL = "normal"
+MODE_CIRCLEC = "circlec"
+
+# Cue event kinds emitted by CountdownEngine
+CUE_WARNING = "warning"   # 5 s warning: carries visual + sound key
+CUE_COUNT = "count"       # 3, 2, 1 beeps
+CUE_END = "end"           # 0 s
+CUE_LOOP = "loop"         # a new loop has started (visuals reset)
+
+# Shortest loop the engine will schedule, so a 0 s preset cannot stall update()
+MIN_LOOP_TIME = 0.01
+
+# Default cue points of a loop: (seconds before the loop end, kind) in the
+# order they fire. A preset or phase may list its own instead (compile_cues).
+CUE_POINTS = ((5.0, CUE_WARNING), (3.0, CUE_COUNT), (2.0, CUE_COUNT), (1.0, CUE_COUNT))
+COUNT_SOUND = "count_321"
+END_SOUND = "end_0s"
+
+# scheduled_ns is when the cue was due on the deadline, fired_ns when update() saw it
+CueEvent = namedtuple("CueEvent", "kind sound visual loop_count scheduled_ns fired_ns")
+
+# One compiled cue: ns before the loop end, kind, sound key, visual (None keeps the current one)
+CuePoint = namedtuple("CuePoint", "offset_ns kind sound visual")
+END_CUE = CuePoint(0, CUE_END, END_SOUND, None)
+
+# One loop of a phase program: length in seconds, warning visual, warning sound
+# key, and its cues in firing order. cue_keys holds the negated offsets
+# (ascending) so bisect finds how many cues are already due; shown[n] is the
+# display once the first n cues have fired.
+Phase = namedtuple("Phase", "time visual sound cues cue_keys shown")
+# Compiled program: phases[0] is the first loop, next_index[i] the phase after phases[i]
+PhaseProgram = namedtuple("PhaseProgram", "phases next_index")
+
+# Key of each mode's program in a preset's "phases" table (settings.json)
+PROGRAM_KEYS = {MODE_NORMAL: "start", MODE_CIRCLEC: "circlec"}
+DEFAULT_WARNING_SOUNDS = {MODE_NORMAL: "warning_5s_red", MODE_CIRCLEC: "warning_5s_circlec"}
+# Loops after the first when a preset declares no program of its own:
+# START is Red -> Red -> Yellow (counting the first loop), CircleC always red
+DEFAULT_CYCLES = {
+    MODE_NORMAL: ({}, {"warning": "yellow", "sound": "warning_5s_yellow"}, {}),
+    MODE_CIRCLEC: ({},),
+}
+
+
+def seconds_to_ns(seconds):
+    # Loop times are entered with 2 decimals, so round to whole ns once here
+    # and do all further deadline arithmetic on integers.
+    return int(round(float(seconds) * NS_PER_SEC))
+
+
+def phase_specs(preset, mode):
+    # The preset's program for `mode` as settings.json holds it:
+    # {"first": {...}, "cycle": [{...}, ...]}; empty when it declares none
+    return (preset.get('phases') or {}).get(PROGRAM_KEYS[mode]) or {}
+
+
+def timed_phases(preset, mode):
+    # Cycle phases that set their own length, i.e. the ones the settings
+    # dialogs edit instead of the preset's single loop time
+    return [spec for spec in phase_specs(preset, mode).get('cycle') or [] if 'time' in spec]
+
+
+def compile_cues(specs, sound, visual):
+    # A settings.json cue list -> CuePoints in firing order. Each entry is
+    # {"at": seconds before the loop end, "sound": key, "warning": visual};
+    # an entry with a "warning" changes the display and defaults to the
+    # phase's warning sound, any other entry defaults to the count beep.
+    # specs=None gives the 5 s warning and 3-2-1 count.
+    if specs is None:
+        return tuple(CuePoint(seconds_to_ns(offset), kind, sound if kind == CUE_WARNING else COUNT_SOUND,
+                              visual if kind == CUE_WARNING else None)
+                     for offset, kind in CUE_POINTS)
+    cues = []
+    for spec in specs:
+        try:
+            offset_ns = seconds_to_ns(spec['at'])
+        except (KeyError, TypeError, ValueError):
+            print(f"Ignoring cue without a valid 'at': {spec!r}")
+            continue
+        if offset_ns <= 0:
+            continue  # the end sound is always played at 0
+        if 'warning' in spec:
+            cues.append(CuePoint(offset_ns, CUE_WARNING, spec.get('sound', sound), spec['warning']))
+        else:
+            cues.append(CuePoint(offset_ns, CUE_COUNT, spec.get('sound', COUNT_SOUND), None))
+    cues.sort(key=lambda cue: -cue.offset_ns)
+    return tuple(cues)
+
+
+def compile_program(settings, preset_index, mode):
+    # Resolves a preset's phase program once, at start. Each phase may set
+    # "time", "warning" and "sound"; missing values come from the preset
+    # (first_time / time) or the CircleC settings, a red warning and the
+    # mode's default sound. After the first loop the cycle repeats forever.
+    # Cues come from the phase's "cues", else the preset's, else the default.
+    preset = settings.presets[preset_index]
+    if mode == MODE_CIRCLEC:
+        first_time, loop_time = settings.circlec_first_time, settings.circlec_loop_time
+    else:
+        first_time, loop_time = preset.get('first_time', 5.00), preset['time']
+    specs = phase_specs(preset, mode)
+    sound = DEFAULT_WARNING_SOUNDS[mode]
+
+    def phase(spec, default_time, min_time=0.0):
+        visual, warning_sound = spec.get('warning', "red"), spec.get('sound', sound)
+        cues = compile_cues(spec.get('cues', preset.get('cues')), warning_sound, visual)
+        shown = ["none"]
+        for cue in cues:
+            shown.append(shown[-1] if cue.visual is None else cue.visual)
+        return Phase(max(min_time, float(spec.get('time', default_time))), visual, warning_sound,
+                     cues, tuple(-cue.offset_ns for cue in cues), tuple(shown))
+
+    phases = [phase(specs.get('first') or {}, first_time)]
+    phases += [phase(spec, loop_time, MIN_LOOP_TIME) for spec in specs.get('cycle') or DEFAULT_CYCLES[mode]]
+    return PhaseProgram(tuple(phases), tuple(range(1, len(phases))) + (1,))
+
+
+class LoopDeadline:
+    # Absolute time.monotonic_ns() end of the running loop.
+    # time_left is always derived from this, never decremented per tick, so a
+    # late or skipped QTimer tick can no longer turn into permanent drift.
+
+    def __init__(self, clock=time.monotonic_ns):
+        self.clock = clock
+        self.end_ns = None
+
+    @property
+    def active(self):
+        return self.end_ns is not None
+
+    def start(self, duration, start_ns=None):
+        if start_ns is None:
+            start_ns = self.clock()
+        self.end_ns = start_ns + seconds_to_ns(duration)
+
+    def clear(self):
+        self.end_ns = None
+
+    def carry(self, duration):
+        # Next loop starts exactly where the previous one ended, not where the
+        # tick that noticed it happened to land.
+        self.end_ns += seconds_to_ns(duration)
+
+    def shift(self, seconds):
+        # Latency slider nudge: positive values give more time left
+        self.end_ns += seconds_to_ns(seconds)
+
+    def remaining_ns(self, now_ns=None):
+        if self.end_ns is None:
+            return 0
+        if now_ns is None:
+            now_ns = self.clock()
+        return self.end_ns - now_ns
+
+    def remaining(self, now_ns=None):
+        return self.remaining_ns(now_ns) / NS_PER_SEC
+
+
+class SimulatedClock:
+    # Injectable clock for CountdownEngine: time only moves when advance() is called
+
+    def __init__(self, start_ns=0):
+        self.now_ns = start_ns
+
+    def __call__(self):
+        return self.now_ns
+
+    def advance(self, seconds):
+        self.now_ns += seconds_to_ns(seconds)
+
+
+class TimerSettings:
+    # Minimal stand-in for the settings attributes CountdownEngine reads.
+    # CountdownTimerApp exposes the same attribute names and is passed directly.
+
+    def __init__(self):
+        self.presets = [
+            {'label': '1', 'time': 20.0, 'first_time': 5.0},
+            {'label': '2', 'time': 17.75, 'first_time': 5.0},
+            {'label': '3', 'time': 23.75, 'first_time': 5.0}
+        ]
+        self.circlec_loop_time = 19.15
+        self.circlec_first_time = 5.00
+        migrate_label3_phases(self.presets, {})
+
+    @classmethod
+    def from_dict(cls, data):
+        settings = cls()
+        if 'presets' in data:
+            settings.presets = migrate_label3_phases(data['presets'], data)
+        settings.circlec_loop_time = float(data.get('circlec_loop_time', settings.circlec_loop_time))
+        settings.circlec_first_time = float(data.get('circlec_first_time', settings.circlec_first_time))
+        return settings
+
+
+class CountdownEngine:
+    # Qt-free countdown logic: loop counting, phase programs and the
+    # warning / 3-2-1 / end cues. The GUI only forwards input and renders state.
+    #
+    # Call update() from any tick source (or advance(dt) with a SimulatedClock);
+    # every cue that became due since the last call is returned in order, even
+    # across several loop boundaries, so long jumps simulate exactly.
+
+    def __init__(self, settings, clock=time.monotonic_ns):
+        self.settings = settings
+        self.clock = clock
+        self.deadline = LoopDeadline(clock)
+        self.listeners = []
+
+        self.mode = MODE_NORMAL
+        self.preset_index = 0
+        self.running = False
+        self.loop_count = 1
+        self.loop_length = 0.0  # Duration of the current loop (first_time on loop 1)
+        self.warning = "none"
+        self._idle_time = 0.0
+        self._next_cue = 0
+        self._program = None  # PhaseProgram of the running mode, compiled at start
+        self._phase = 0  # index into _program.phases of the current loop
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    # --- Input ---
+
+    def select_preset(self, index):
+        if self.running:
+            return False
+        self.preset_index = index
+        self.reset_idle()
+        return True
+
+    def reset_idle(self):
+        # Stopped state shows the preset loop time with a full bar
+        self._idle_time = float(self.settings.presets[self.preset_index]['time'])
+        self.loop_length = self._idle_time
+        self.loop_count = 1
+        self.warning = "none"
+
+    def start(self, start_ns=None):
+        # NORMAL start interrupts circlec if it's running
+        if self.running and self.mode != MODE_CIRCLEC:
+            return False
+        self._begin(MODE_NORMAL, start_ns)
+        return True
+
+    def start_circlec(self, start_ns=None):
+        if self.running:
+            return False
+        self._begin(MODE_CIRCLEC, start_ns)
+        return True
+
+    def reload_program(self):
+        # Settings changed while running: the loop in progress keeps its
+        # deadline, loops after it follow the new program
+        if self.running:
+            program = compile_program(self.settings, self.preset_index, self.mode)
+            self._phase = min(self._phase, len(program.phases) - 1)
+            self._program = program
+            # Cues of the new list that are already behind count as fired
+            phase = program.phases[self._phase]
+            self._next_cue = bisect_right(phase.cue_keys, -self.deadline.remaining_ns())
+            self.warning = phase.shown[self._next_cue]
+
+    def stop(self):
+        self.running = False
+        self.mode = MODE_NORMAL
+        self.deadline.clear()
+        self.reset_idle()
+
+    def nudge(self, seconds):
+        # Latency adjust: move the deadline and re-arm cues that are ahead again
+        if not self.running or seconds == 0:
+            return
+        self.deadline.shift(seconds)
+        # Cues whose offset is below the new time left are ahead again; the
+        # sorted list means one binary search however many cues there are
+        phase = self._program.phases[self._phase]
+        armed = min(self._next_cue, bisect_right(phase.cue_keys, -self.deadline.remaining_ns()))
+        # The display goes back to what the cues still fired had set
+        self.warning = phase.shown[armed]
+        self._next_cue = armed
+
+    # --- Clock ---
+
+    def advance(self, seconds):
+        self.clock.advance(seconds)
+        return self.update()
+
+    def update(self, now_ns=None):
+        if not self.running:
+            return []
+        if now_ns is None:
+            now_ns = self.clock()
+        events = []
+        while True:
+            # Only the next cue is compared, so a tick costs the same for any cue list
+            remaining_ns = self.deadline.end_ns - now_ns
+            cues = self._program.phases[self._phase].cues
+            if self._next_cue < len(cues):
+                cue = cues[self._next_cue]
+                if remaining_ns <= cue.offset_ns:
+                    self._next_cue += 1
+                    events.append(self._cue(cue, self.deadline.end_ns - cue.offset_ns, now_ns))
+                    continue
+            if remaining_ns <= 0:
+                events.append(self._cue(END_CUE, self.deadline.end_ns, now_ns))
+                self._next_loop()
+                events.append(CueEvent(CUE_LOOP, None, "none", self.loop_count,
+                                       self.deadline.end_ns - seconds_to_ns(self.loop_length), now_ns))
+                continue
+            break
+        for event in events:
+            for callback in self.listeners:
+                callback(event)
+        return events
+
+    def upcoming_cues(self):
+        # [(due monotonic ns, sound key)] for the rest of this loop and the
+        # whole next one, so audio can be scheduled ahead of the tick.
+        if not self.running:
+            return []
+        end_ns = self.deadline.end_ns
+        start_ns = end_ns - seconds_to_ns(self.loop_length)
+        phases = self._program.phases
+        phase = phases[self._phase]
+        # A loop shorter than a cue's offset fires that cue right at its start
+        cues = [(max(start_ns, end_ns - cue.offset_ns), cue.sound) for cue in phase.cues[self._next_cue:]]
+        cues.append((end_ns, END_SOUND))
+
+        next_phase = phases[self._program.next_index[self._phase]]
+        next_end_ns = end_ns + seconds_to_ns(next_phase.time)
+        for cue in next_phase.cues:
+            cues.append((max(end_ns, next_end_ns - cue.offset_ns), cue.sound))
+        cues.append((next_end_ns, END_SOUND))
+        return cues
+
+    def next_due_ns(self):
+        # Monotonic ns of the next cue or loop end, None when stopped.
+        # update() at or after this time returns at least one event.
+        if not self.running:
+            return None
+        end_ns = self.deadline.end_ns
+        cues = self._program.phases[self._phase].cues
+        if self._next_cue < len(cues):
+            return end_ns - cues[self._next_cue].offset_ns
+        return end_ns
+
+    def time_left(self, now_ns=None):
+        if not self.running:
+            return self._idle_time
+        return max(0.0, self.deadline.remaining(now_ns))
+
+    def snapshot(self, now_ns=None):
+        # Plain dict of what the display shows, for readers outside the GUI.
+        # phase is the warning sound of the current loop (red, yellow, slow, ...);
+        # stopped, it is the first loop's of a START.
+        if self.running:
+            phase = self._program.phases[self._phase]
+        else:
+            phase = compile_program(self.settings, self.preset_index, MODE_NORMAL).phases[0]
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "preset_index": self.preset_index,
+            "loop_count": self.loop_count,
+            "loop_length": self.loop_length,
+            "time_left": round(self.time_left(now_ns), 3),
+            "end_ns": self.deadline.end_ns,
+            "warning": self.warning,
+            "phase": phase.sound,
+            "phase_index": self._phase if self.running else 0,
+        }
+
+    # --- Loop logic ---
+
+    def _begin(self, mode, start_ns):
+        self._program = compile_program(self.settings, self.preset_index, mode)
+        self._phase = 0
+        self.running = True
+        self.mode = mode
+        self.loop_count = 1
+        self.loop_length = self._program.phases[0].time
+        self.warning = "none"
+        self._next_cue = 0
+        self.deadline.start(self.loop_length, start_ns)
+
+    def _next_loop(self):
+        # Next phase is a table lookup; the program was resolved at start
+        self._phase = self._program.next_index[self._phase]
+        self.loop_count += 1
+        self.loop_length = self._program.phases[self._phase].time
+        self.warning = "none"
+        self._next_cue = 0
+        # Carry the boundary forward so the tick's lateness is not lost
+        self.deadline.carry(self.loop_length)
+
+    def _cue(self, cue, scheduled_ns, now_ns):
+        if cue.visual is not None:
+            self.warning = cue.visual
+        return CueEvent(cue.kind, cue.sound, self.warning, self.loop_count, scheduled_ns, now_ns)
+
+
+def simulate_schedule(settings, preset_index, mode, seconds, step=None):
+    # Runs the engine faster than real time and returns every cue event.
+    # step=None jumps straight to the end; a step (e.g. 0.01) mimics the GUI tick.
+    clock = SimulatedClock()
+    engine = CountdownEngine(settings, clock)
+    engine.select_preset(preset_index)
+    if mode == MODE_CIRCLEC:
+        engine.start_circlec()
+    else:
+        engine.start()
+    events = engine.update()
+    if step is None:
+        events += engine.advance(seconds)
+    else:
+        end_ns = clock.now_ns + seconds_to_ns(seconds)
+        while clock.now_ns < end_ns:
+            events += engine.advance(step)
+    return events
+
+
+def simulate_drift(loops=10000, loop_times=(23.75, 23.5), first_time=5.0, tick_ms=10):
+    # Drives LoopDeadline with an irregular fake tick (late, coalesced and
+    # skipped ticks) and compares every loop boundary with the ideal one.
+    # The ideal is summed in exact decimal seconds, not through seconds_to_ns,
+    # so an error in how the deadline is set or carried shows up.
+    import random
+    from fractions import Fraction
+
+    rng = random.Random(1234)
+    now = [0]
+    deadline = LoopDeadline(clock=lambda: now[0])
+    deadline.start(first_time)
+
+    ideal_end = Fraction(str(first_time))
+    worst_error = 0
+    completed = 0
+    tick_ns = tick_ms * 1_000_000
+    while completed < loops:
+        # Jump close to the boundary, then tick irregularly across it
+        now[0] = max(now[0], deadline.end_ns - 5 * tick_ns)
+        while deadline.remaining_ns() > 0:
+            now[0] += tick_ns * rng.choice((1, 1, 1, 2, 3)) + rng.randrange(0, 4_000_000)
+        next_time = loop_times[completed % len(loop_times)]
+        deadline.carry(next_time)
+        ideal_end += Fraction(str(next_time))
+        error_ns = deadline.end_ns - ideal_end * NS_PER_SEC
+        worst_error = max(worst_error, abs(error_ns))
+        completed += 1
+    return {"loops": completed, "cumulative_error_ns": round(error_ns), "worst_error_ns": round(worst_error)}
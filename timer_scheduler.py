@@ -0,0 +1,130 @@
+import time
+import heapq
+import threading
+
+from timer_engine import CountdownEngine, TimerSettings, MODE_CIRCLEC
+
+
+class TimerScheduler:
+    # Runs any number of independent CountdownEngines off one clock.
+    #
+    # Each timer has its own settings (presets, phases) and engine state. The
+    # scheduler keeps one heap entry per running timer, keyed by that engine's
+    # next_due_ns(), so a wake-up only touches the timers that are actually due:
+    # O(k log n) for k due timers out of n, instead of updating all n per tick.
+    # Stale heap entries (timer stopped, nudged or restarted) are skipped lazily.
+    #
+    # Every method may be called from any thread while run() drives the clock:
+    # the heap, the due table and the engines are only touched under `lock`.
+    # Change an engine through start/stop/nudge, or hold `lock` while changing
+    # it directly and call reschedule() before releasing it. Listeners are
+    # called outside the lock.
+
+    def __init__(self, clock=time.monotonic_ns):
+        self.clock = clock
+        self.timers = {}
+        self.listeners = []
+        self._due = {}  # name -> due ns of its live heap entry
+        self._heap = []  # (due ns, seq, name)
+        self._seq = 0
+        self._changed = threading.Event()
+        self.lock = threading.RLock()
+
+    def add_listener(self, callback):
+        # callback(name, CueEvent) for every event of every timer
+        self.listeners.append(callback)
+
+    # --- Timers ---
+
+    def add(self, name, settings=None, preset_index=0):
+        with self.lock:
+            if name in self.timers:
+                raise ValueError(f"timer {name!r} already exists")
+            engine = CountdownEngine(settings if settings is not None else TimerSettings(), self.clock)
+            engine.select_preset(preset_index)
+            self.timers[name] = engine
+            return engine
+
+    def remove(self, name):
+        with self.lock:
+            self.timers.pop(name, None)
+            self._due.pop(name, None)
+
+    def start(self, name, mode=None, start_ns=None):
+        with self.lock:
+            engine = self.timers[name]
+            if mode == MODE_CIRCLEC:
+                started = engine.start_circlec(start_ns)
+            else:
+                started = engine.start(start_ns)
+            self.reschedule(name)
+            return started
+
+    def stop(self, name):
+        with self.lock:
+            self.timers[name].stop()
+            self.reschedule(name)
+
+    def nudge(self, name, seconds):
+        with self.lock:
+            self.timers[name].nudge(seconds)
+            self.reschedule(name)
+
+    def reschedule(self, name):
+        # Call after changing an engine directly (start/stop/nudge/settings)
+        with self.lock:
+            engine = self.timers.get(name)
+            due_ns = engine.next_due_ns() if engine is not None else None
+            if due_ns is None:
+                self._due.pop(name, None)
+            elif self._due.get(name) != due_ns:
+                self._due[name] = due_ns
+                self._seq += 1
+                heapq.heappush(self._heap, (due_ns, self._seq, name))
+        self._changed.set()
+
+    # --- Clock ---
+
+    def next_wake_ns(self):
+        # Earliest due time over all running timers, None if nothing runs
+        with self.lock:
+            heap = self._heap
+            while heap:
+                due_ns, _, name = heap[0]
+                if self._due.get(name) == due_ns:
+                    return due_ns
+                heapq.heappop(heap)
+            return None
+
+    def run_due(self, now_ns=None):
+        # Fires everything due up to now; returns [(name, CueEvent)] in time order
+        if now_ns is None:
+            now_ns = self.clock()
+        fired = []
+        with self.lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now_ns:
+                due_ns, _, name = heapq.heappop(heap)
+                if self._due.get(name) != due_ns:
+                    continue
+                del self._due[name]
+                engine = self.timers[name]
+                for event in engine.update(now_ns):
+                    fired.append((name, event))
+                self.reschedule(name)
+        fired.sort(key=lambda item: item[1].scheduled_ns)
+        for name, event in fired:
+            for callback in self.listeners:
+                callback(name, event)
+        return fired
+
+    def run(self, stop_event, max_sleep=1.0):
+        # Blocking driver for a real clock: sleeps until the next due cue (or a
+        # change made from another thread) and fires it. Returns when stop_event is set.
+        while not stop_event.is_set():
+            self._changed.clear()
+            self.run_due()
+            wake_ns = self.next_wake_ns()
+            timeout = max_sleep if wake_ns is None else min(max_sleep, max(0.0, (wake_ns - self.clock()) / 1e9))
+            if timeout > 0:
+                self._changed.wait(timeout)